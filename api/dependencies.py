@@ -1,11 +1,15 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+import jwt
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from cachetools import TTLCache
 from datetime import datetime
 from typing import Optional
+import asyncio
+import hashlib
+import time
 
-from ..models.user import User
+from ..models.user import User, oid
 from ..utils.db import get_database
 
 # OAuth2 scheme for token authentication
@@ -15,12 +19,84 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 SECRET_KEY = "your-secret-key"  # Change this in production
 ALGORITHM = "HS256"
 
+# Fields loaded for the authenticated user (skips the password hash and enrolment list)
+USER_AUTH_PROJECTION = {
+    "_id": 1,
+    "email": 1,
+    "name": 1,
+    "role": 1,
+    "created_at": 1,
+    "updated_at": 1,
+    "last_login": 1,
+    "is_active": 1,
+    "is_instructor": 1,
+    "is_admin": 1
+}
+
+# Course fields needed for access checks and prompts (skips the materials list)
+COURSE_PROJECTION = {
+    "title": 1,
+    "description": 1,
+    "teacher_id": 1,
+    "students": 1
+}
+
+# Short-lived caches for decoded tokens and resolved users
+_payload_cache: TTLCache = TTLCache(maxsize=10000, ttl=30)
+_user_cache: TTLCache = TTLCache(maxsize=5000, ttl=30)
+
+# Users whose last_login was written recently; writes are skipped until the entry expires
+LAST_LOGIN_WRITE_INTERVAL = 300  # seconds
+_last_login_written: TTLCache = TTLCache(maxsize=10000, ttl=LAST_LOGIN_WRITE_INTERVAL)
+_background_tasks: set = set()
+
 async def get_db() -> AsyncIOMotorDatabase:
     """
     Dependency to get database instance.
     """
     return await get_database()
 
+def get_cached_token_payload(token: str) -> dict:
+    """
+    Decode a JWT, reusing the payload of recently seen tokens.
+    Raises jwt.PyJWTError if the token is invalid or has expired.
+    """
+    key = hashlib.sha256(token.encode()).digest()[:16]
+    payload = _payload_cache.get(key)
+    if payload is None:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        _payload_cache[key] = payload
+    
+    # Cached entries may outlive the token itself
+    exp = payload.get("exp")
+    if exp is not None and exp <= time.time():
+        _payload_cache.pop(key, None)
+        raise jwt.ExpiredSignatureError("Signature has expired")
+    
+    return payload
+
+def touch_last_login(db: AsyncIOMotorDatabase, user_id: str):
+    """
+    Record the user's last login time in the background, at most once per interval.
+    """
+    if user_id in _last_login_written:
+        return
+    _last_login_written[user_id] = True
+    
+    task = asyncio.create_task(db.users.update_one(
+        {"_id": user_id},
+        {"$set": {"last_login": datetime.utcnow()}}
+    ))
+    # Keep a reference so the task is not garbage collected before it finishes
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+def invalidate_cached_user(user_id: str):
+    """
+    Drop a cached user so the next request reloads it from the database.
+    """
+    _user_cache.pop(str(user_id), None)
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncIOMotorDatabase = Depends(get_db)
@@ -35,24 +111,26 @@ async def get_current_user(
     )
     
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = get_cached_token_payload(token)
         user_id: str = payload.get("sub")
         if user_id is None:
             raise credentials_exception
-    except JWTError:
+    except jwt.PyJWTError:
         raise credentials_exception
     
-    user = await db.users.find_one({"_id": user_id})
-    if user is None:
-        raise credentials_exception
+    current_user = _user_cache.get(user_id)
+    if current_user is None:
+        user = await db.users.find_one({"_id": user_id}, USER_AUTH_PROJECTION)
+        if user is None:
+            raise credentials_exception
+        
+        current_user = User.model_validate(user)
+        _user_cache[user_id] = current_user
     
     # Update last login time
-    await db.users.update_one(
-        {"_id": user_id},
-        {"$set": {"last_login": datetime.utcnow()}}
-    )
+    touch_last_login(db, user_id)
     
-    return User.model_validate(user)
+    return current_user
 
 async def verify_admin(current_user: User = Depends(get_current_user)) -> User:
     """
@@ -0,0 +1,15 @@
+"""
+ASGI middleware for the LMS API
+"""
+
+from .base import ASGIMiddleware
+from .cors import FastCORS
+from .gzip import StreamSafeGZip
+from .timestamp import RequestTimeMiddleware
+
+__all__ = [
+    "ASGIMiddleware",
+    "FastCORS",
+    "StreamSafeGZip",
+    "RequestTimeMiddleware"
+]
@@ -0,0 +1,17 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+class ASGIMiddleware:
+    """
+    Base class for project middleware, written directly against ASGI.
+    Subclasses implement dispatch(); unlike BaseHTTPMiddleware (and
+    @app.middleware("http")) this adds no extra task or request/response
+    objects per request.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        await self.dispatch(scope, receive, send)
+    
+    async def dispatch(self, scope: Scope, receive: Receive, send: Send):
+        raise NotImplementedError
@@ -0,0 +1,123 @@
+from typing import Iterable, List, Tuple
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from .base import ASGIMiddleware
+
+# Request headers browsers may always send without listing them in a preflight
+SAFELISTED_HEADERS = {"accept", "accept-language", "content-language", "content-type"}
+
+class FastCORS(ASGIMiddleware):
+    """
+    Pure ASGI CORS middleware for a fixed set of origins, methods and headers.
+    Follows the same rules as Starlette's CORSMiddleware, but everything that
+    does not depend on the request is encoded once, up front.
+    """
+    def __init__(
+        self,
+        app: ASGIApp,
+        origins: Iterable[str],
+        allow_methods: Iterable[str] = ("GET",),
+        allow_headers: Iterable[str] = (),
+        allow_credentials: bool = False,
+        expose_headers: Iterable[str] = (),
+        max_age: int = 600
+    ):
+        super().__init__(app)
+        self.allowed_origins = frozenset(origin.encode("latin-1") for origin in origins)
+        self.allowed_methods = frozenset(method.upper().encode("latin-1") for method in allow_methods)
+        self.allowed_headers = frozenset(
+            header.lower().encode("latin-1")
+            for header in SAFELISTED_HEADERS.union(allow_headers)
+        )
+        
+        # Added to every response for an allowed origin
+        simple_headers = [(b"vary", b"Origin")]
+        if allow_credentials:
+            simple_headers.append((b"access-control-allow-credentials", b"true"))
+        if expose_headers:
+            simple_headers.append(
+                (b"access-control-expose-headers", ", ".join(expose_headers).encode("latin-1"))
+            )
+        self.simple_headers: List[Tuple[bytes, bytes]] = simple_headers
+        
+        # Preflight responses only differ by the echoed origin
+        preflight_headers = [
+            (b"vary", b"Origin"),
+            (b"access-control-allow-methods", b", ".join(sorted(self.allowed_methods))),
+            (b"access-control-allow-headers", b", ".join(sorted(self.allowed_headers))),
+            (b"access-control-max-age", str(max_age).encode("latin-1"))
+        ]
+        if allow_credentials:
+            preflight_headers.append((b"access-control-allow-credentials", b"true"))
+        self.preflight_headers: List[Tuple[bytes, bytes]] = preflight_headers
+    
+    async def dispatch(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        origin = None
+        request_method = None
+        request_headers = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                request_method = value
+            elif name == b"access-control-request-headers":
+                request_headers = value
+        
+        # Not a cross-origin request
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+        
+        if scope["method"] == "OPTIONS" and request_method is not None:
+            await self.preflight(origin, request_method, request_headers, send)
+            return
+        
+        if origin not in self.allowed_origins:
+            await self.app(scope, receive, send)
+            return
+        
+        async def send_with_cors(message: Message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (b"access-control-allow-origin", origin),
+                    *self.simple_headers
+                ]
+            await send(message)
+        
+        await self.app(scope, receive, send_with_cors)
+    
+    async def preflight(self, origin: bytes, request_method: bytes, request_headers, send: Send):
+        """
+        Answer a CORS preflight request without calling the application.
+        """
+        failures = []
+        if origin not in self.allowed_origins:
+            failures.append("origin")
+        if request_method.upper() not in self.allowed_methods:
+            failures.append("method")
+        if request_headers:
+            requested = {header.strip().lower() for header in request_headers.split(b",")}
+            if not requested.issubset(self.allowed_headers):
+                failures.append("headers")
+        
+        if failures:
+            status = 400
+            body = ("Disallowed CORS " + ", ".join(failures)).encode("latin-1")
+        else:
+            status = 200
+            body = b"OK"
+        
+        headers = [
+            (b"content-type", b"text/plain; charset=utf-8"),
+            (b"content-length", str(len(body)).encode("latin-1")),
+            *self.preflight_headers
+        ]
+        if not failures:
+            headers.append((b"access-control-allow-origin", origin))
+        
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
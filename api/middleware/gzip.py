@@ -0,0 +1,21 @@
+from typing import Iterable
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+from .base import ASGIMiddleware
+
+class StreamSafeGZip(ASGIMiddleware):
+    """
+    GZip compression that leaves streamed endpoints alone.
+    Starlette's GZipMiddleware buffers a streamed body until it ends, which
+    would hold back every chunk of a streamed AI completion.
+    """
+    def __init__(self, app: ASGIApp, exclude_paths: Iterable[str] = (), **gzip_options):
+        super().__init__(app)
+        self.gzip = GZipMiddleware(app, **gzip_options)
+        self.exclude_paths = tuple(exclude_paths)
+    
+    async def dispatch(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http" and not scope["path"].startswith(self.exclude_paths):
+            await self.gzip(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
@@ -0,0 +1,20 @@
+from datetime import datetime
+from starlette.types import Receive, Scope, Send
+from .base import ASGIMiddleware
+from ...models._time import request_time
+
+class RequestTimeMiddleware(ASGIMiddleware):
+    """
+    Take one timestamp per HTTP request for model timestamp defaults.
+    WebSocket connections are long-lived, so they keep reading the clock.
+    """
+    async def dispatch(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        token = request_time.set(datetime.utcnow())
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_time.reset(token)
@@ -1,13 +1,16 @@
 from fastapi import APIRouter, HTTPException, Depends, status
 from typing import List, Dict, Any
-from bson import ObjectId
 from datetime import datetime, timedelta
+import asyncio
 
-from ...models.user import User
+from ...models.user import User, USER_LIST_ADAPTER
 from ...models.course import Course
 from ...models.material import Material
 from ...models.quiz import Quiz
-from ..dependencies import get_current_user, get_db, verify_admin
+from ...models.user_progress import UserProgress
+from ...models.quiz_submission import QuizSubmission
+from ..dependencies import get_db, verify_admin, invalidate_cached_user, oid
+from ...utils.responses import MongoJSONResponse
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 router = APIRouter(
@@ -21,27 +24,36 @@ router = APIRouter(
 async def get_admin_dashboard(
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
-    # Get system statistics
-    total_users = await db[User.Collection.name].count_documents({})
-    total_courses = await db[Course.Collection.name].count_documents({})
-    total_materials = await db[Material.Collection.name].count_documents({})
-    total_quizzes = await db[Quiz.Collection.name].count_documents({})
-    
-    # Get active users in last 7 days
     week_ago = datetime.utcnow() - timedelta(days=7)
-    active_users = await db[User.Collection.name].count_documents({
-        "last_login": {"$gte": week_ago}
-    })
     
-    # Get instructor statistics
-    instructors = await db[User.Collection.name].count_documents({
-        "is_instructor": True
-    })
-    
-    # Get course completion statistics
-    completed_courses = await db[UserProgress.Collection.name].count_documents({
-        "progress_percentage": 100
-    })
+    # Run all statistics queries concurrently
+    (
+        total_users,
+        total_courses,
+        total_materials,
+        total_quizzes,
+        active_users,
+        instructors,
+        completed_courses
+    ) = await asyncio.gather(
+        # System statistics (unfiltered, so collection metadata is enough)
+        db[User.Collection.name].estimated_document_count(),
+        db[Course.Collection.name].estimated_document_count(),
+        db[Material.Collection.name].estimated_document_count(),
+        db[Quiz.Collection.name].estimated_document_count(),
+        # Active users in last 7 days
+        db[User.Collection.name].count_documents({
+            "last_login": {"$gte": week_ago}
+        }),
+        # Instructor statistics
+        db[User.Collection.name].count_documents({
+            "is_instructor": True
+        }),
+        # Course completion statistics
+        db[UserProgress.Collection.name].count_documents({
+            "progress_percentage": 100
+        })
+    )
     
     return {
         "system_stats": {
@@ -62,8 +74,8 @@ async def get_all_users(
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
     cursor = db[User.Collection.name].find().skip(skip).limit(limit)
-    users = await cursor.to_list(length=None)
-    return [User.model_validate(user) for user in users]
+    users = await cursor.to_list(length=limit)
+    return USER_LIST_ADAPTER.validate_python(users)
 
 @router.put("/users/{user_id}/role")
 async def update_user_role(
@@ -71,7 +83,7 @@ async def update_user_role(
     role_update: Dict[str, bool],
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
-    user = await db[User.Collection.name].find_one({"_id": ObjectId(user_id)})
+    user = await db[User.Collection.name].find_one({"_id": oid(user_id)})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -88,9 +100,10 @@ async def update_user_role(
         )
     
     await db[User.Collection.name].update_one(
-        {"_id": ObjectId(user_id)},
+        {"_id": oid(user_id)},
         {"$set": update_data}
     )
+    invalidate_cached_user(user_id)
     
     return {"message": "User roles updated successfully"}
 
@@ -99,14 +112,18 @@ async def delete_user(
     user_id: str,
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
-    user = await db[User.Collection.name].find_one({"_id": ObjectId(user_id)})
+    user = await db[User.Collection.name].find_one({"_id": oid(user_id)})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     # Delete user's data
-    await db[User.Collection.name].delete_one({"_id": ObjectId(user_id)})
-    await db[UserProgress.Collection.name].delete_many({"user_id": ObjectId(user_id)})
-    await db[QuizSubmission.Collection.name].delete_many({"user_id": ObjectId(user_id)})
+    uid = oid(user_id)
+    await asyncio.gather(
+        db[User.Collection.name].delete_one({"_id": uid}),
+        db[UserProgress.Collection.name].delete_many({"user_id": uid}),
+        db[QuizSubmission.Collection.name].delete_many({"user_id": uid})
+    )
+    invalidate_cached_user(user_id)
     
     return {"message": "User and associated data deleted successfully"}
 
@@ -117,8 +134,9 @@ async def get_audit_log(
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
     cursor = db["audit_log"].find().sort("timestamp", -1).skip(skip).limit(limit)
-    logs = await cursor.to_list(length=None)
-    return logs
+    logs = await cursor.to_list(length=limit)
+    # Raw documents; encoded straight to JSON, ObjectIds included
+    return MongoJSONResponse(logs)
 
 @router.post("/system/maintenance")
 async def run_system_maintenance(
@@ -132,30 +150,52 @@ async def run_system_maintenance(
     
     # Archive old audit logs
     month_ago = datetime.utcnow() - timedelta(days=30)
-    await db["audit_log_archive"].insert_many(
-        await db["audit_log"].find({"timestamp": {"$lt": month_ago}}).to_list(None)
-    )
+    await db["audit_log"].aggregate([
+        {"$match": {"timestamp": {"$lt": month_ago}}},
+        {"$merge": "audit_log_archive"}
+    ]).to_list(None)
     await db["audit_log"].delete_many({"timestamp": {"$lt": month_ago}})
     
-    # Update course statistics
-    courses = await db[Course.Collection.name].find().to_list(None)
-    for course in courses:
-        enrolled = await db[UserProgress.Collection.name].count_documents({
-            "course_id": course["_id"]
-        })
-        completed = await db[UserProgress.Collection.name].count_documents({
-            "course_id": course["_id"],
-            "progress_percentage": 100
-        })
-        await db[Course.Collection.name].update_one(
-            {"_id": course["_id"]},
-            {
-                "$set": {
-                    "enrolled_count": enrolled,
-                    "completion_count": completed,
-                    "last_updated": datetime.utcnow()
-                }
+    # Update course statistics in a single server-side pass; driven from the
+    # courses so those without progress records are reset to zero
+    pipeline = [
+        {"$project": {"_id": 1}},
+        {
+            "$lookup": {
+                "from": UserProgress.Collection.name,
+                "let": {"course_id": "$_id"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$eq": ["$course_id", "$$course_id"]}}},
+                    {
+                        "$group": {
+                            "_id": None,
+                            "enrolled": {"$sum": 1},
+                            "completed": {
+                                "$sum": {"$cond": [{"$eq": ["$progress_percentage", 100]}, 1, 0]}
+                            }
+                        }
+                    }
+                ],
+                "as": "stats"
             }
-        )
+        },
+        {"$set": {"stats": {"$arrayElemAt": ["$stats", 0]}}},
+        {
+            "$project": {
+                "enrolled_count": {"$ifNull": ["$stats.enrolled", 0]},
+                "completion_count": {"$ifNull": ["$stats.completed", 0]},
+                "last_updated": "$$NOW"
+            }
+        },
+        {
+            "$merge": {
+                "into": Course.Collection.name,
+                "on": "_id",
+                "whenMatched": "merge",
+                "whenNotMatched": "discard"
+            }
+        }
+    ]
+    await db[Course.Collection.name].aggregate(pipeline).to_list(None)
     
     return {"message": "System maintenance completed successfully"} 
\ No newline at end of file
@@ -1,17 +1,36 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from typing import List, Any, Optional
+from fastapi.responses import StreamingResponse
+from typing import List, Any, Optional, AsyncIterator, Tuple
 from models.user import User
 from utils.auth import get_current_user
+from backend.api.dependencies import oid, COURSE_PROJECTION
+from backend.utils.ai_helpers import get_openai_client
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from bson import ObjectId
-import openai
+from cachetools import TTLCache
+import asyncio
 import os
+import weakref
 from dotenv import load_dotenv
 
 load_dotenv()
 
 router = APIRouter()
 
+# Maximum number of quiz submissions included in a prompt
+SUBMISSIONS_LIMIT = 500
+
+# Generated learning content keyed by (topic, difficulty), with one lock per key
+_content_cache: TTLCache = TTLCache(maxsize=1024, ttl=3600)
+_content_locks: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+
+async def stream_content(stream) -> AsyncIterator[str]:
+    """
+    Yield the text of a streamed chat completion as it arrives.
+    """
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
 @router.post("/personalize")
 async def get_personalized_content(
     course_id: str,
@@ -23,44 +42,44 @@ async def get_personalized_content(
     """
     db: AsyncIOMotorDatabase = request.app.mongodb
     
+    # Get course and student's quiz submissions together
+    course, submissions = await asyncio.gather(
+        db.courses.find_one({"_id": oid(course_id)}, COURSE_PROJECTION),
+        db.quiz_submissions.find(
+            {"student_id": oid(current_user.id), "course_id": oid(course_id)}
+        ).to_list(length=SUBMISSIONS_LIMIT)
+    )
+    
     # Verify course access
-    course = await db.courses.find_one({"_id": ObjectId(course_id)})
     if not course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found"
         )
     
-    if current_user.role == "student" and ObjectId(current_user.id) not in course["students"]:
+    if current_user.role == "student" and oid(current_user.id) not in course["students"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enrolled in this course"
         )
     
-    # Get student's quiz submissions
-    submissions = await db.quiz_submissions.find(
-        {"student_id": ObjectId(current_user.id), "course_id": ObjectId(course_id)}
-    ).to_list(length=None)
-    
     try:
         # Use OpenAI to generate personalized recommendations
-        response = openai.ChatCompletion.create(
+        stream = await get_openai_client().chat.completions.create(
             model="gpt-3.5-turbo",
             messages=[
                 {"role": "system", "content": "You are an educational assistant providing personalized learning recommendations."},
                 {"role": "user", "content": f"Based on the student's quiz submissions and course materials, provide personalized learning recommendations. Course: {course['title']}, Submissions: {submissions}"}
-            ]
+            ],
+            stream=True
         )
-        
-        return {
-            "recommendations": response.choices[0].message.content
-        }
-        
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error generating recommendations: {str(e)}"
         )
+    
+    return StreamingResponse(stream_content(stream), media_type="text/plain")
 
 @router.post("/generate-content")
 async def generate_learning_content(
@@ -72,24 +91,41 @@ async def generate_learning_content(
     """
     Generate learning content using AI.
     """
-    try:
-        response = openai.ChatCompletion.create(
+    key = (topic.lower().strip(), difficulty)
+    cached = _content_cache.get(key)
+    if cached is not None:
+        return StreamingResponse(iter([cached]), media_type="text/plain")
+    
+    lock = _content_locks.setdefault(key, asyncio.Lock())
+    return StreamingResponse(generate_content(key, lock), media_type="text/plain")
+
+async def generate_content(key: Tuple[str, str], lock: asyncio.Lock) -> AsyncIterator[str]:
+    """
+    Stream newly generated content for a (topic, difficulty) key and cache the result.
+    Concurrent requests for the same key wait here and are served from the cache.
+    """
+    topic, difficulty = key
+    async with lock:
+        cached = _content_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+        
+        stream = await get_openai_client().chat.completions.create(
             model="gpt-3.5-turbo",
             messages=[
                 {"role": "system", "content": "You are an educational content creator."},
                 {"role": "user", "content": f"Create comprehensive learning content about {topic} at {difficulty} level. Include explanations, examples, and practice questions."}
-            ]
+            ],
+            stream=True
         )
         
-        return {
-            "content": response.choices[0].message.content
-        }
+        parts = []
+        async for content in stream_content(stream):
+            parts.append(content)
+            yield content
         
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error generating content: {str(e)}"
-        )
+        _content_cache[key] = "".join(parts)
 
 @router.post("/analyze-performance")
 async def analyze_performance(
@@ -103,14 +139,6 @@ async def analyze_performance(
     """
     db: AsyncIOMotorDatabase = request.app.mongodb
     
-    # Verify course access
-    course = await db.courses.find_one({"_id": ObjectId(course_id)})
-    if not course:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Course not found"
-        )
-    
     # If student_id is provided, verify permissions
     if student_id:
         if current_user.role not in ["admin", "teacher"]:
@@ -118,34 +146,42 @@ async def analyze_performance(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not enough permissions"
             )
-        target_id = ObjectId(student_id)
+        target_id = oid(student_id)
     else:
-        target_id = ObjectId(current_user.id)
+        target_id = oid(current_user.id)
+    
+    # Get course and student's submissions together
+    course, submissions = await asyncio.gather(
+        db.courses.find_one({"_id": oid(course_id)}, COURSE_PROJECTION),
+        db.quiz_submissions.find(
+            {"student_id": target_id, "course_id": oid(course_id)}
+        ).to_list(length=SUBMISSIONS_LIMIT)
+    )
     
-    # Get student's submissions
-    submissions = await db.quiz_submissions.find(
-        {"student_id": target_id, "course_id": ObjectId(course_id)}
-    ).to_list(length=None)
+    # Verify course access
+    if not course:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Course not found"
+        )
     
     try:
         # Use OpenAI to analyze performance
-        response = openai.ChatCompletion.create(
+        stream = await get_openai_client().chat.completions.create(
             model="gpt-3.5-turbo",
             messages=[
                 {"role": "system", "content": "You are an educational analyst."},
                 {"role": "user", "content": f"Analyze the student's performance in {course['title']} based on their quiz submissions: {submissions}. Provide insights on strengths, weaknesses, and improvement areas."}
-            ]
+            ],
+            stream=True
         )
-        
-        return {
-            "analysis": response.choices[0].message.content
-        }
-        
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error analyzing performance: {str(e)}"
         )
+    
+    return StreamingResponse(stream_content(stream), media_type="text/plain")
 
 @router.post("/chat-assistant")
 async def chat_with_assistant(
@@ -162,25 +198,23 @@ async def chat_with_assistant(
     
     # If course_id is provided, add course context
     if course_id:
-        course = await db.courses.find_one({"_id": ObjectId(course_id)})
+        course = await db.courses.find_one({"_id": oid(course_id)}, COURSE_PROJECTION)
         if course:
             context = f"Course context: {course['title']} - {course['description']}"
     
     try:
-        response = openai.ChatCompletion.create(
+        stream = await get_openai_client().chat.completions.create(
             model="gpt-3.5-turbo",
             messages=[
                 {"role": "system", "content": "You are an AI learning assistant helping students with their studies."},
                 {"role": "user", "content": f"{context}\n\nStudent question: {message}"}
-            ]
+            ],
+            stream=True
         )
-        
-        return {
-            "response": response.choices[0].message.content
-        }
-        
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error in chat assistant: {str(e)}"
-        ) 
\ No newline at end of file
+        )
+    
+    return StreamingResponse(stream_content(stream), media_type="text/plain") 
\ No newline at end of file
@@ -3,8 +3,7 @@ from fastapi.security import OAuth2PasswordRequestForm
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import jwt
-from passlib.context import CryptContext
+import jwt
 from bson import ObjectId
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
@@ -24,9 +23,6 @@ router = APIRouter(
     tags=["Authentication"]
 )
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # Login request model
 class LoginRequest(BaseModel):
     email: str
@@ -1,15 +1,57 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request, WebSocket, WebSocketDisconnect
-from typing import List, Any, Dict
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, WebSocket, WebSocketDisconnect
+from pydantic import TypeAdapter
+from typing import List, Any, Dict, Optional
 from models.chat import Message, ChatRoom, MessageCreate, MessageResponse
 from models.user import User
 from utils.auth import get_current_user, check_teacher_permission
+from backend.api.dependencies import oid, COURSE_PROJECTION
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
+from cachetools import TTLCache
+import asyncio
 import json
+import orjson
 from datetime import datetime
 
 router = APIRouter()
 
+_MESSAGE_LIST_ADAPTER = TypeAdapter(List[MessageResponse])
+
+# Display names and course titles rarely change, so lookups are served from memory
+_user_name_cache: TTLCache = TTLCache(maxsize=10000, ttl=300)
+_course_title_cache: TTLCache = TTLCache(maxsize=2000, ttl=600)
+
+async def get_user_names(db: AsyncIOMotorDatabase, user_ids: List[ObjectId]) -> Dict[ObjectId, str]:
+    """
+    Resolve user ids to display names, fetching any uncached ones in a single query.
+    """
+    names = {}
+    missing = []
+    for user_id in set(user_ids):
+        name = _user_name_cache.get(user_id)
+        if name is None:
+            missing.append(user_id)
+        else:
+            names[user_id] = name
+    
+    if missing:
+        async for user in db.users.find({"_id": {"$in": missing}}, {"name": 1}):
+            names[user["_id"]] = _user_name_cache[user["_id"]] = user["name"]
+    
+    return names
+
+async def get_course_title(db: AsyncIOMotorDatabase, course_id: ObjectId) -> Optional[str]:
+    """
+    Resolve a course id to its title, or None if the course does not exist.
+    """
+    title = _course_title_cache.get(course_id)
+    if title is None:
+        course = await db.courses.find_one({"_id": course_id}, {"title": 1})
+        if course is None:
+            return None
+        title = _course_title_cache[course_id] = course["title"]
+    return title
+
 # WebSocket connection manager
 class ConnectionManager:
     def __init__(self):
@@ -22,15 +64,25 @@ class ConnectionManager:
         self.active_connections[course_id].append(websocket)
 
     def disconnect(self, websocket: WebSocket, course_id: str):
-        if course_id in self.active_connections:
-            self.active_connections[course_id].remove(websocket)
-            if not self.active_connections[course_id]:
+        connections = self.active_connections.get(course_id)
+        if connections and websocket in connections:
+            connections.remove(websocket)
+            if not connections:
                 del self.active_connections[course_id]
 
     async def broadcast(self, message: str, course_id: str):
-        if course_id in self.active_connections:
-            for connection in self.active_connections[course_id]:
-                await connection.send_text(message)
+        connections = list(self.active_connections.get(course_id, []))
+        if not connections:
+            return
+        
+        # Send to all clients concurrently so one slow client does not hold up the rest
+        results = await asyncio.gather(
+            *(connection.send_text(message) for connection in connections),
+            return_exceptions=True
+        )
+        for connection, result in zip(connections, results):
+            if isinstance(result, Exception):
+                self.disconnect(connection, course_id)
 
 manager = ConnectionManager()
 
@@ -49,27 +101,31 @@ async def websocket_endpoint(
             # Save message to database
             db: AsyncIOMotorDatabase = request.app.mongodb
             message = Message(
-                course_id=ObjectId(course_id),
-                sender_id=ObjectId(message_data["sender_id"]),
+                course_id=oid(course_id),
+                sender_id=oid(message_data["sender_id"]),
                 text=message_data["text"],
-                reply_to=ObjectId(message_data["reply_to"]) if message_data.get("reply_to") else None
+                reply_to=oid(message_data["reply_to"]) if message_data.get("reply_to") else None
             )
             
-            result = await db.messages.insert_one(message.dict(by_alias=True))
-            message.id = result.inserted_id
+            doc = message.model_dump(by_alias=True)
+            result = await db.messages.insert_one(doc)
+            doc["_id"] = result.inserted_id
             
             # Get sender and course info for the response
-            sender = await db.users.find_one({"_id": message.sender_id})
-            course = await db.courses.find_one({"_id": message.course_id})
+            sender_names, course_name = await asyncio.gather(
+                get_user_names(db, [message.sender_id]),
+                get_course_title(db, message.course_id)
+            )
             
-            response = MessageResponse(
-                **message.dict(by_alias=True),
-                sender_name=sender["name"],
-                course_name=course["title"]
+            response = MessageResponse.from_mongo(
+                doc,
+                sender_name=sender_names[message.sender_id],
+                course_name=course_name
             )
             
-            # Broadcast to all connections in the course
-            await manager.broadcast(response.json(), course_id)
+            # Encode once and broadcast to all connections in the course
+            payload = orjson.dumps(response.model_dump(mode="json", by_alias=True)).decode()
+            await manager.broadcast(payload, course_id)
             
     except WebSocketDisconnect:
         manager.disconnect(websocket, course_id)
@@ -86,14 +142,14 @@ async def create_chat_room(
     db: AsyncIOMotorDatabase = request.app.mongodb
     
     # Verify course exists and user is the teacher
-    course = await db.courses.find_one({"_id": ObjectId(room.course_id)})
+    course = await db.courses.find_one({"_id": oid(room.course_id)}, COURSE_PROJECTION)
     if not course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found"
         )
     
-    if course["teacher_id"] != ObjectId(current_user.id) and current_user.role != "admin":
+    if course["teacher_id"] != oid(current_user.id) and current_user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not the teacher of this course"
@@ -116,21 +172,21 @@ async def list_chat_rooms(
     db: AsyncIOMotorDatabase = request.app.mongodb
     
     # Verify course exists and user has access
-    course = await db.courses.find_one({"_id": ObjectId(course_id)})
+    course = await db.courses.find_one({"_id": oid(course_id)}, COURSE_PROJECTION)
     if not course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found"
         )
     
-    if current_user.role == "student" and ObjectId(current_user.id) not in course["students"]:
+    if current_user.role == "student" and oid(current_user.id) not in course["students"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enrolled in this course"
         )
     
     rooms = await db.chat_rooms.find(
-        {"course_id": ObjectId(course_id)}
+        {"course_id": oid(course_id)}
     ).to_list(length=None)
     
     return rooms
@@ -148,50 +204,49 @@ async def get_messages(
     db: AsyncIOMotorDatabase = request.app.mongodb
     
     # Verify course exists and user has access
-    course = await db.courses.find_one({"_id": ObjectId(course_id)})
+    course = await db.courses.find_one({"_id": oid(course_id)}, COURSE_PROJECTION)
     if not course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found"
         )
     
-    if current_user.role == "student" and ObjectId(current_user.id) not in course["students"]:
+    if current_user.role == "student" and oid(current_user.id) not in course["students"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enrolled in this course"
         )
     
-    # Get messages with sender and course info
-    pipeline = [
-        {"$match": {"course_id": ObjectId(course_id)}},
-        {"$sort": {"timestamp": -1}},
-        {"$limit": limit},
+    # Get the most recent messages, served by the (course_id, timestamp) index
+    messages = await db.messages.find(
+        {"course_id": oid(course_id)},
         {
-            "$lookup": {
-                "from": "users",
-                "localField": "sender_id",
-                "foreignField": "_id",
-                "as": "sender"
-            }
-        },
-        {"$unwind": "$sender"},
-        {
-            "$project": {
-                "_id": 1,
-                "course_id": 1,
-                "sender_id": 1,
-                "text": 1,
-                "timestamp": 1,
-                "is_pinned": 1,
-                "reply_to": 1,
-                "sender_name": "$sender.name",
-                "course_name": course["title"]
-            }
+            "_id": 1,
+            "course_id": 1,
+            "sender_id": 1,
+            "text": 1,
+            "timestamp": 1,
+            "is_pinned": 1,
+            "reply_to": 1
         }
-    ]
+    ).sort("timestamp", -1).limit(limit).to_list(length=limit)
     
-    messages = await db.messages.aggregate(pipeline).to_list(length=None)
-    return messages
+    sender_names = await get_user_names(db, [m["sender_id"] for m in messages])
+    
+    # Messages from senders that no longer exist are skipped
+    messages = [
+        MessageResponse.from_mongo(
+            message,
+            sender_name=sender_names[message["sender_id"]],
+            course_name=course["title"]
+        )
+        for message in messages
+        if message["sender_id"] in sender_names
+    ]
+    return Response(
+        content=_MESSAGE_LIST_ADAPTER.dump_json(messages, by_alias=True),
+        media_type="application/json"
+    )
 
 @router.post("/messages/{course_id}/pin/{message_id}")
 async def pin_message(
@@ -206,14 +261,14 @@ async def pin_message(
     db: AsyncIOMotorDatabase = request.app.mongodb
     
     # Verify course exists and user is the teacher
-    course = await db.courses.find_one({"_id": ObjectId(course_id)})
+    course = await db.courses.find_one({"_id": oid(course_id)}, COURSE_PROJECTION)
     if not course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found"
         )
     
-    if course["teacher_id"] != ObjectId(current_user.id) and current_user.role != "admin":
+    if course["teacher_id"] != oid(current_user.id) and current_user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not the teacher of this course"
@@ -221,7 +276,7 @@ async def pin_message(
     
     # Update message
     result = await db.messages.update_one(
-        {"_id": ObjectId(message_id), "course_id": ObjectId(course_id)},
+        {"_id": oid(message_id), "course_id": oid(course_id)},
         {"$set": {"is_pinned": True}}
     )
     
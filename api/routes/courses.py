@@ -1,13 +1,60 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from pydantic import TypeAdapter
 from typing import List, Any
 from models.course import Course, CourseCreate, CourseInDB, Material
 from models.user import User
 from utils.auth import get_current_user, check_teacher_permission
+from backend.utils.cache import response_cache
+from backend.api.dependencies import oid
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
+from pymongo import ReturnDocument
 
 router = APIRouter()
 
+_COURSE_LIST_ADAPTER = TypeAdapter(List[Course])
+
+def invalidate_course_cache(course_id: ObjectId):
+    """
+    Drop cached reads of a course and all cached course listings.
+    """
+    response_cache.invalidate("course", str(course_id))
+    response_cache.invalidate("courses")
+
+def course_filter(user: User) -> dict:
+    """
+    Match the courses a user can see: students see their enrolled courses,
+    teachers their own courses and admins every course.
+    """
+    role = user.role
+    if role == "student":
+        return {"students": oid(user.id)}
+    if role == "teacher":
+        return {"teacher_id": oid(user.id)}
+    return {}
+
+def teacher_filter(course_id: ObjectId, user: User) -> dict:
+    """
+    Match a course only if the user teaches it (admins match any course).
+    """
+    if user.role == "admin":
+        return {"_id": course_id}
+    return {"_id": course_id, "teacher_id": oid(user.id)}
+
+async def raise_course_not_writable(db: AsyncIOMotorDatabase, course_id: ObjectId):
+    """
+    Explain why a write filtered by teacher_filter matched nothing.
+    """
+    if await db.courses.find_one({"_id": course_id}, {"_id": 1}) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Course not found"
+        )
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="Not the teacher of this course"
+    )
+
 @router.post("/", response_model=Course)
 async def create_course(
     course_in: CourseCreate,
@@ -21,11 +68,12 @@ async def create_course(
     
     course = CourseInDB(
         **course_in.dict(),
-        teacher_id=ObjectId(current_user.id)
+        teacher_id=oid(current_user.id)
     )
     
     result = await db.courses.insert_one(course.dict(by_alias=True))
     course.id = result.inserted_id
+    response_cache.invalidate("courses")
     
     return course
 
@@ -39,21 +87,18 @@ async def list_courses(
     """
     db: AsyncIOMotorDatabase = request.app.mongodb
     
-    if current_user.role == "student":
-        # Students see only enrolled courses
-        courses = await db.courses.find(
-            {"students": ObjectId(current_user.id)}
-        ).to_list(length=None)
-    elif current_user.role == "teacher":
-        # Teachers see their own courses
-        courses = await db.courses.find(
-            {"teacher_id": ObjectId(current_user.id)}
-        ).to_list(length=None)
-    else:
-        # Admins see all courses
-        courses = await db.courses.find().to_list(length=None)
-    
-    return courses
+    cache_key = (str(current_user.id), current_user.role)
+    courses = response_cache.get("courses", cache_key)
+    if courses is None:
+        courses = await db.courses.find(course_filter(current_user)).to_list(length=None)
+        courses = [Course.from_mongo(course) for course in courses]
+        response_cache.set("courses", cache_key, courses)
+    
+    # Already validated; serialize directly instead of re-validating against response_model
+    return Response(
+        content=_COURSE_LIST_ADAPTER.dump_json(courses, by_alias=True),
+        media_type="application/json"
+    )
 
 @router.get("/{course_id}", response_model=Course)
 async def get_course(
@@ -65,21 +110,26 @@ async def get_course(
     Get a specific course.
     """
     db: AsyncIOMotorDatabase = request.app.mongodb
-    
-    course = await db.courses.find_one({"_id": ObjectId(course_id)})
-    if not course:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Course not found"
-        )
+    uid = oid(current_user.id)
+    cid = oid(course_id)
+    
+    course = response_cache.get("course", str(cid))
+    if course is None:
+        course = await db.courses.find_one({"_id": cid})
+        if not course:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Course not found"
+            )
+        response_cache.set("course", str(cid), course)
     
     # Check permissions
-    if current_user.role == "student" and ObjectId(current_user.id) not in course["students"]:
+    if current_user.role == "student" and uid not in course["students"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enrolled in this course"
         )
-    elif current_user.role == "teacher" and course["teacher_id"] != ObjectId(current_user.id):
+    elif current_user.role == "teacher" and course["teacher_id"] != uid:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not the teacher of this course"
@@ -98,29 +148,19 @@ async def update_course(
     Update a course.
     """
     db: AsyncIOMotorDatabase = request.app.mongodb
+    cid = oid(course_id)
     
-    course = await db.courses.find_one({"_id": ObjectId(course_id)})
-    if not course:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Course not found"
-        )
-    
-    # Check if user is the teacher
-    if course["teacher_id"] != ObjectId(current_user.id) and current_user.role != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not the teacher of this course"
-        )
-    
-    # Update course
+    # Update course, only if the user is its teacher
     update_data = course_in.dict(exclude_unset=True)
-    await db.courses.update_one(
-        {"_id": ObjectId(course_id)},
-        {"$set": update_data}
+    updated_course = await db.courses.find_one_and_update(
+        teacher_filter(cid, current_user),
+        {"$set": update_data},
+        return_document=ReturnDocument.AFTER
     )
+    if updated_course is None:
+        await raise_course_not_writable(db, cid)
     
-    updated_course = await db.courses.find_one({"_id": ObjectId(course_id)})
+    invalidate_course_cache(cid)
     return updated_course
 
 @router.delete("/{course_id}")
@@ -133,23 +173,13 @@ async def delete_course(
     Delete a course.
     """
     db: AsyncIOMotorDatabase = request.app.mongodb
+    cid = oid(course_id)
     
-    course = await db.courses.find_one({"_id": ObjectId(course_id)})
-    if not course:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Course not found"
-        )
-    
-    # Check if user is the teacher
-    if course["teacher_id"] != ObjectId(current_user.id) and current_user.role != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not the teacher of this course"
-        )
-    
-    # Delete course
-    await db.courses.delete_one({"_id": ObjectId(course_id)})
+    # Delete course, only if the user is its teacher
+    result = await db.courses.delete_one(teacher_filter(cid, current_user))
+    if result.deleted_count == 0:
+        await raise_course_not_writable(db, cid)
+    invalidate_course_cache(cid)
     
     return {"message": "Course deleted successfully"}
 
@@ -164,26 +194,15 @@ async def add_material(
     Add material to a course.
     """
     db: AsyncIOMotorDatabase = request.app.mongodb
+    cid = oid(course_id)
     
-    course = await db.courses.find_one({"_id": ObjectId(course_id)})
-    if not course:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Course not found"
-        )
-    
-    # Check if user is the teacher
-    if course["teacher_id"] != ObjectId(current_user.id) and current_user.role != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not the teacher of this course"
-        )
-    
-    # Add material
-    await db.courses.update_one(
-        {"_id": ObjectId(course_id)},
-        {"$push": {"materials": material.dict(by_alias=True)}}
+    # Add material, only if the user is the course's teacher
+    updated_course = await db.courses.find_one_and_update(
+        teacher_filter(cid, current_user),
+        {"$push": {"materials": material.dict(by_alias=True)}},
+        return_document=ReturnDocument.AFTER
     )
-    
-    updated_course = await db.courses.find_one({"_id": ObjectId(course_id)})
+    if updated_course is None:
+        await raise_course_not_writable(db, cid)
+    invalidate_course_cache(cid)
     return updated_course 
\ No newline at end of file
@@ -1,11 +1,17 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Response, status
+from pydantic import TypeAdapter
 from typing import List
 from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from collections import Counter
 from datetime import datetime
+import asyncio
 
 from ...models.material import Material
 from ...models.user import User
-from ..dependencies import get_current_user, get_db
+from ..dependencies import get_current_user, get_db, oid
+from .progress import invalidate_course_totals
+from ...utils.cache import response_cache
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 router = APIRouter(
@@ -14,6 +20,48 @@ router = APIRouter(
     responses={404: {"description": "Not found"}}
 )
 
+# Material views not yet written to the database, flushed periodically in bulk
+view_buffer: Counter = Counter()
+VIEW_FLUSH_INTERVAL = 5  # seconds
+
+# Documents fetched per round trip when listing a course's materials
+MATERIALS_BATCH_SIZE = 500
+
+_MATERIAL_LIST_ADAPTER = TypeAdapter(List[Material])
+
+async def flush_material_views(db: AsyncIOMotorDatabase):
+    """
+    Write buffered material views to the database in a single bulk operation.
+    """
+    if not view_buffer:
+        return
+    
+    pending = dict(view_buffer)
+    view_buffer.clear()
+    try:
+        await db[Material.Collection.name].bulk_write(
+            [UpdateOne({"_id": material_id}, {"$inc": {"views": count}}) for material_id, count in pending.items()],
+            ordered=False
+        )
+    except Exception:
+        # Keep the counts for the next flush
+        view_buffer.update(pending)
+        raise
+
+async def run_view_flusher(db: AsyncIOMotorDatabase):
+    """
+    Flush buffered material views every VIEW_FLUSH_INTERVAL seconds until cancelled.
+    """
+    try:
+        while True:
+            await asyncio.sleep(VIEW_FLUSH_INTERVAL)
+            try:
+                await flush_material_views(db)
+            except Exception as e:
+                print(f"Error flushing material views: {e}")
+    finally:
+        await flush_material_views(db)
+
 @router.post("/", response_model=Material)
 async def create_material(
     material: Material,
@@ -28,9 +76,10 @@ async def create_material(
     
     material.created_by = current_user.id
     material.updated_at = datetime.utcnow()
-    result = await db[Material.Collection.name].insert_one(material.model_dump(by_alias=True))
-    created_material = await db[Material.Collection.name].find_one({"_id": result.inserted_id})
-    return Material.model_validate(created_material)
+    await db[Material.Collection.name].insert_one(material.model_dump(by_alias=True))
+    invalidate_course_totals(material.course_id)
+    response_cache.invalidate("materials", str(material.course_id))
+    return material
 
 @router.get("/{material_id}", response_model=Material)
 async def get_material(
@@ -38,15 +87,12 @@ async def get_material(
     current_user: User = Depends(get_current_user),
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
-    material = await db[Material.Collection.name].find_one({"_id": ObjectId(material_id)})
+    material = await db[Material.Collection.name].find_one({"_id": oid(material_id)})
     if not material:
         raise HTTPException(status_code=404, detail="Material not found")
     
-    # Update views count
-    await db[Material.Collection.name].update_one(
-        {"_id": ObjectId(material_id)},
-        {"$inc": {"views": 1}}
-    )
+    # Count the view; written to the database by the background flusher
+    view_buffer[material["_id"]] += 1
     
     return Material.model_validate(material)
 
@@ -56,9 +102,45 @@ async def get_course_materials(
     current_user: User = Depends(get_current_user),
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
-    cursor = db[Material.Collection.name].find({"course_id": ObjectId(course_id)})
-    materials = await cursor.to_list(length=None)
-    return [Material.model_validate(material) for material in materials]
+    cid = oid(course_id)
+    materials = response_cache.get("materials", str(cid))
+    if materials is not None:
+        return Response(
+            content=_MATERIAL_LIST_ADAPTER.dump_json(materials, by_alias=True),
+            media_type="application/json"
+        )
+    
+    cursor = db[Material.Collection.name].find(
+        {"course_id": cid}
+    ).batch_size(MATERIALS_BATCH_SIZE)
+    # Stored documents are trusted: build the models without validation and
+    # serialize them directly, skipping FastAPI's validation against response_model
+    materials = [Material.from_mongo(material) async for material in cursor]
+    response_cache.set("materials", str(cid), materials)
+    return Response(
+        content=_MATERIAL_LIST_ADAPTER.dump_json(materials, by_alias=True),
+        media_type="application/json"
+    )
+
+def created_by_filter(material_id: ObjectId, user: User) -> dict:
+    """
+    Match a material only if the user created it (admins match any material).
+    """
+    if user.is_admin:
+        return {"_id": material_id}
+    # created_by may have been stored as either an ObjectId or its string form
+    return {"_id": material_id, "created_by": {"$in": [user.id, str(user.id)]}}
+
+async def raise_material_not_writable(db: AsyncIOMotorDatabase, material_id: ObjectId, action: str):
+    """
+    Explain why a write filtered by created_by_filter matched nothing.
+    """
+    if await db[Material.Collection.name].find_one({"_id": material_id}, {"_id": 1}) is None:
+        raise HTTPException(status_code=404, detail="Material not found")
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail=f"Only the creator or admin can {action} materials"
+    )
 
 @router.put("/{material_id}", response_model=Material)
 async def update_material(
@@ -67,27 +149,22 @@ async def update_material(
     current_user: User = Depends(get_current_user),
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
-    existing = await db[Material.Collection.name].find_one({"_id": ObjectId(material_id)})
-    if not existing:
-        raise HTTPException(status_code=404, detail="Material not found")
-    
-    if str(existing["created_by"]) != str(current_user.id) and not current_user.is_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only the creator or admin can update materials"
-        )
-    
-    material_update.id = ObjectId(material_id)
+    mid = oid(material_id)
+    material_update.id = mid
     material_update.updated_at = datetime.utcnow()
     update_data = material_update.model_dump(by_alias=True)
     
-    await db[Material.Collection.name].update_one(
-        {"_id": ObjectId(material_id)},
-        {"$set": update_data}
+    existing = await db[Material.Collection.name].find_one_and_update(
+        created_by_filter(mid, current_user),
+        {"$set": update_data},
+        return_document=ReturnDocument.BEFORE
     )
+    if existing is None:
+        await raise_material_not_writable(db, mid, "update")
     
-    updated = await db[Material.Collection.name].find_one({"_id": ObjectId(material_id)})
-    return Material.model_validate(updated)
+    response_cache.invalidate("materials", str(existing["course_id"]))
+    response_cache.invalidate("materials", str(update_data["course_id"]))
+    return Material.model_validate({**existing, **update_data})
 
 @router.delete("/{material_id}")
 async def delete_material(
@@ -95,17 +172,16 @@ async def delete_material(
     current_user: User = Depends(get_current_user),
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
-    material = await db[Material.Collection.name].find_one({"_id": ObjectId(material_id)})
-    if not material:
-        raise HTTPException(status_code=404, detail="Material not found")
-    
-    if str(material["created_by"]) != str(current_user.id) and not current_user.is_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only the creator or admin can delete materials"
-        )
+    mid = oid(material_id)
+    material = await db[Material.Collection.name].find_one_and_delete(
+        created_by_filter(mid, current_user),
+        projection={"course_id": 1}
+    )
+    if material is None:
+        await raise_material_not_writable(db, mid, "delete")
     
-    await db[Material.Collection.name].delete_one({"_id": ObjectId(material_id)})
+    invalidate_course_totals(material["course_id"])
+    response_cache.invalidate("materials", str(material["course_id"]))
     return {"message": "Material deleted successfully"}
 
 @router.post("/{material_id}/like")
@@ -114,30 +190,28 @@ async def toggle_like_material(
     current_user: User = Depends(get_current_user),
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
-    material = await db[Material.Collection.name].find_one({"_id": ObjectId(material_id)})
+    user_id_str = str(current_user.id)
+    
+    # Add or remove the user from liked_by in one pipeline update
+    liked_by = {"$ifNull": ["$liked_by", []]}
+    material = await db[Material.Collection.name].find_one_and_update(
+        {"_id": oid(material_id)},
+        [
+            {"$set": {"liked_by": {"$cond": [
+                {"$in": [user_id_str, liked_by]},
+                {"$setDifference": [liked_by, [user_id_str]]},
+                {"$concatArrays": [liked_by, [user_id_str]]}
+            ]}}},
+            {"$set": {"likes": {"$size": "$liked_by"}}}
+        ],
+        projection={"course_id": 1, "liked_by": {"$elemMatch": {"$eq": user_id_str}}},
+        return_document=ReturnDocument.AFTER
+    )
     if not material:
         raise HTTPException(status_code=404, detail="Material not found")
     
-    liked_by = material.get("liked_by", [])
-    user_id_str = str(current_user.id)
+    response_cache.invalidate("materials", str(material["course_id"]))
     
-    if user_id_str in liked_by:
-        # Unlike
-        await db[Material.Collection.name].update_one(
-            {"_id": ObjectId(material_id)},
-            {
-                "$pull": {"liked_by": user_id_str},
-                "$inc": {"likes": -1}
-            }
-        )
-        return {"message": "Material unliked successfully"}
-    else:
-        # Like
-        await db[Material.Collection.name].update_one(
-            {"_id": ObjectId(material_id)},
-            {
-                "$addToSet": {"liked_by": user_id_str},
-                "$inc": {"likes": 1}
-            }
-        )
-        return {"message": "Material liked successfully"} 
\ No newline at end of file
+    if material.get("liked_by"):
+        return {"message": "Material liked successfully"}
+    return {"message": "Material unliked successfully"}
@@ -1,12 +1,18 @@
 from fastapi import APIRouter, HTTPException, Depends, status
-from typing import List, Dict, Any
+from typing import Dict, Any, Optional, Tuple
 from bson import ObjectId
+from pymongo import ReturnDocument
+from cachetools import TTLCache
 from datetime import datetime
+import asyncio
 
 from ...models.user_progress import UserProgress
 from ...models.quiz_submission import QuizSubmission
+from ...models.material import Material
+from ...models.quiz import Quiz
 from ...models.user import User
-from ..dependencies import get_current_user, get_db
+from ..dependencies import get_current_user, get_db, oid
+from ...utils.cache import response_cache
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 router = APIRouter(
@@ -15,27 +21,38 @@ router = APIRouter(
     responses={404: {"description": "Not found"}}
 )
 
+# (total_materials, total_quizzes) per course, shared by progress recalculations
+course_totals_cache: TTLCache = TTLCache(maxsize=10000, ttl=60)
+
 @router.get("/course/{course_id}", response_model=UserProgress)
 async def get_course_progress(
     course_id: str,
     current_user: User = Depends(get_current_user),
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
+    cid = oid(course_id)
+    cache_key = (str(current_user.id), str(cid))
+    cached = response_cache.get("progress", cache_key)
+    if cached is not None:
+        return cached
+    
     progress = await db[UserProgress.Collection.name].find_one({
         "user_id": current_user.id,
-        "course_id": ObjectId(course_id)
+        "course_id": cid
     })
     
     if not progress:
         # Initialize progress if not exists
         progress = UserProgress(
             user_id=current_user.id,
-            course_id=ObjectId(course_id)
+            course_id=cid
         ).model_dump(by_alias=True)
         await db[UserProgress.Collection.name].insert_one(progress)
         progress = await db[UserProgress.Collection.name].find_one({"_id": progress["_id"]})
     
-    return UserProgress.model_validate(progress)
+    progress = UserProgress.model_validate(progress)
+    response_cache.set("progress", cache_key, progress)
+    return progress
 
 @router.post("/material/{material_id}/complete")
 async def mark_material_complete(
@@ -43,31 +60,34 @@ async def mark_material_complete(
     current_user: User = Depends(get_current_user),
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
+    mid = oid(material_id)
     # Get material to verify course_id
-    material = await db[Material.Collection.name].find_one({"_id": ObjectId(material_id)})
+    material = await db[Material.Collection.name].find_one({"_id": mid})
     if not material:
         raise HTTPException(status_code=404, detail="Material not found")
     
     course_id = material["course_id"]
     
     # Update progress
-    result = await db[UserProgress.Collection.name].update_one(
+    progress = await db[UserProgress.Collection.name].find_one_and_update(
         {
             "user_id": current_user.id,
             "course_id": course_id
         },
         {
-            "$addToSet": {"completed_materials": ObjectId(material_id)},
+            "$addToSet": {"completed_materials": mid},
             "$set": {
-                "current_material": ObjectId(material_id),
+                "current_material": mid,
                 "updated_at": datetime.utcnow()
             }
         },
-        upsert=True
+        upsert=True,
+        return_document=ReturnDocument.AFTER
     )
     
     # Recalculate progress percentage
-    await update_progress_percentage(db, current_user.id, course_id)
+    await update_progress_percentage(db, current_user.id, course_id, progress)
+    response_cache.invalidate("progress", (str(current_user.id), str(course_id)))
     
     return {"message": "Material marked as completed"}
 
@@ -83,47 +103,98 @@ async def get_course_analytics(
             detail="Only instructors can view course analytics"
         )
     
-    # Get all progress records for the course
-    cursor = db[UserProgress.Collection.name].find({"course_id": ObjectId(course_id)})
-    progress_records = await cursor.to_list(length=None)
-    
-    # Get quiz submissions
-    quiz_cursor = db[QuizSubmission.Collection.name].find({"course_id": ObjectId(course_id)})
-    quiz_submissions = await quiz_cursor.to_list(length=None)
-    
-    # Calculate analytics
-    total_students = len(progress_records)
-    completed_students = len([p for p in progress_records if p["progress_percentage"] == 100])
-    avg_progress = sum(p["progress_percentage"] for p in progress_records) / total_students if total_students > 0 else 0
+    cid = oid(course_id)
+    completed_score = {"$cond": [{"$eq": ["$status", "completed"]}, "$total_score", None]}
+    
+    # Aggregate progress and quiz statistics server-side, concurrently
+    progress_stats, quiz_stats = await asyncio.gather(
+        db[UserProgress.Collection.name].aggregate([
+            {"$match": {"course_id": cid}},
+            {
+                "$group": {
+                    "_id": None,
+                    "total": {"$sum": 1},
+                    "completed": {
+                        "$sum": {"$cond": [{"$eq": ["$progress_percentage", 100]}, 1, 0]}
+                    },
+                    "average": {"$avg": "$progress_percentage"}
+                }
+            }
+        ]).to_list(length=1),
+        db[QuizSubmission.Collection.name].aggregate([
+            {"$match": {"course_id": cid}},
+            {
+                "$group": {
+                    "_id": None,
+                    "total": {"$sum": 1},
+                    "completed": {
+                        "$sum": {"$cond": [{"$eq": ["$status", "completed"]}, 1, 0]}
+                    },
+                    # Scores of incomplete submissions are None and ignored
+                    "average": {"$avg": completed_score},
+                    "highest": {"$max": completed_score},
+                    "lowest": {"$min": completed_score}
+                }
+            }
+        ]).to_list(length=1)
+    )
     
-    quiz_stats = calculate_quiz_statistics(quiz_submissions)
+    progress_stats = progress_stats[0] if progress_stats else {}
+    quiz_stats = quiz_stats[0] if quiz_stats else {}
     
     return {
-        "total_students": total_students,
-        "completed_students": completed_students,
-        "average_progress": avg_progress,
-        "quiz_statistics": quiz_stats
+        "total_students": progress_stats.get("total", 0),
+        "completed_students": progress_stats.get("completed", 0),
+        "average_progress": progress_stats.get("average") or 0,
+        "quiz_statistics": {
+            "average_score": quiz_stats.get("average") or 0,
+            "highest_score": quiz_stats.get("highest") or 0,
+            "lowest_score": quiz_stats.get("lowest") or 0,
+            "completion_rate": (quiz_stats["completed"] / quiz_stats["total"]) * 100 if quiz_stats else 0
+        }
     }
 
+async def get_course_totals(db: AsyncIOMotorDatabase, course_id: ObjectId) -> Tuple[int, int]:
+    """
+    Get the number of materials and quizzes in a course.
+    """
+    totals = course_totals_cache.get(course_id)
+    if totals is None:
+        totals = tuple(await asyncio.gather(
+            db[Material.Collection.name].count_documents({"course_id": course_id}),
+            db[Quiz.Collection.name].count_documents({"course_id": course_id})
+        ))
+        course_totals_cache[course_id] = totals
+    return totals
+
+def invalidate_course_totals(course_id: ObjectId):
+    """
+    Drop cached course totals after materials or quizzes are added or removed.
+    """
+    course_totals_cache.pop(course_id, None)
+
 async def update_progress_percentage(
     db: AsyncIOMotorDatabase,
     user_id: ObjectId,
-    course_id: ObjectId
+    course_id: ObjectId,
+    progress: Optional[Dict[str, Any]] = None
 ):
-    # Get total materials and quizzes in course
-    total_materials = await db[Material.Collection.name].count_documents({"course_id": course_id})
-    total_quizzes = await db[Quiz.Collection.name].count_documents({"course_id": course_id})
+    # Get total materials and quizzes in course, and user progress unless the caller already has it
+    queries = [get_course_totals(db, course_id)]
+    if progress is None:
+        queries.append(db[UserProgress.Collection.name].find_one({
+            "user_id": user_id,
+            "course_id": course_id
+        }))
+    
+    (total_materials, total_quizzes), *fetched = await asyncio.gather(*queries)
     total_items = total_materials + total_quizzes
+    if fetched:
+        progress = fetched[0]
     
     if total_items == 0:
         return
     
-    # Get user progress
-    progress = await db[UserProgress.Collection.name].find_one({
-        "user_id": user_id,
-        "course_id": course_id
-    })
-    
     if not progress:
         return
     
@@ -141,22 +212,3 @@ async def update_progress_percentage(
             }
         }
     )
-
-def calculate_quiz_statistics(submissions: List[Dict[str, Any]]) -> Dict[str, Any]:
-    if not submissions:
-        return {
-            "average_score": 0,
-            "highest_score": 0,
-            "lowest_score": 0,
-            "completion_rate": 0
-        }
-    
-    completed = [s for s in submissions if s["status"] == "completed"]
-    scores = [s["total_score"] for s in completed]
-    
-    return {
-        "average_score": sum(scores) / len(scores) if scores else 0,
-        "highest_score": max(scores) if scores else 0,
-        "lowest_score": min(scores) if scores else 0,
-        "completion_rate": (len(completed) / len(submissions)) * 100
-    } 
\ No newline at end of file
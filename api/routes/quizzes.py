@@ -1,11 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from typing import List, Any
-from models.quiz import Quiz, QuizCreate, QuizInDB, QuizSubmission
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from pydantic import TypeAdapter
+from typing import List, Any, Optional, Tuple
+from models.quiz import Question, Quiz, QuizCreate, QuizInDB, QuizSubmission
 from models.user import User
 from utils.auth import get_current_user, check_teacher_permission
+from backend.api.routes.progress import invalidate_course_totals
+from backend.utils.cache import response_cache
+from backend.utils.ai_helpers import get_openai_client
+from backend.api.dependencies import oid
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
-import openai
+from cachetools import TTLCache
+import asyncio
+import hashlib
+import orjson
 import os
 from dotenv import load_dotenv
 
@@ -13,6 +21,79 @@ load_dotenv()
 
 router = APIRouter()
 
+_QUIZ_LIST_ADAPTER = TypeAdapter(List[Quiz])
+
+# Raw completion text keyed by a hash of the prompt; parsed on every hit so
+# callers never share a mutable result
+_completion_cache: TTLCache = TTLCache(maxsize=4096, ttl=86400)
+
+# Cap on concurrent OpenAI requests, to stay within the account's rate limits
+_openai_semaphore = asyncio.Semaphore(int(os.getenv("OPENAI_MAX_CONCURRENCY", "8")))
+
+async def json_completion(messages: List[dict]) -> dict:
+    """
+    Run a JSON-mode chat completion, reusing the result of identical prompts.
+    """
+    key = hashlib.blake2b(orjson.dumps(messages), digest_size=16).hexdigest()
+    cached = _completion_cache.get(key)
+    if cached is not None:
+        return orjson.loads(cached)
+    
+    async with _openai_semaphore:
+        response = await get_openai_client().chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=messages,
+            response_format={"type": "json_object"}
+        )
+    
+    # Only cache responses that parse
+    content = response.choices[0].message.content
+    result = orjson.loads(content)
+    _completion_cache[key] = content
+    return result
+
+async def get_quiz_with_course(
+    db: AsyncIOMotorDatabase,
+    quiz_id: str,
+    user_id: ObjectId
+) -> Tuple[Optional[dict], Optional[dict]]:
+    """
+    Fetch a quiz and its course in a single round trip.
+    The course's students list is reduced to the given user, if enrolled.
+    """
+    results = await db.quizzes.aggregate([
+        {"$match": {"_id": oid(quiz_id)}},
+        {
+            "$lookup": {
+                "from": "courses",
+                "let": {"course_id": "$course_id"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$eq": ["$_id", "$$course_id"]}}},
+                    # Only the fields needed for access checks
+                    {
+                        "$project": {
+                            "teacher_id": 1,
+                            "students": {
+                                "$filter": {
+                                    "input": {"$ifNull": ["$students", []]},
+                                    "cond": {"$eq": ["$$this", user_id]}
+                                }
+                            }
+                        }
+                    }
+                ],
+                "as": "course"
+            }
+        }
+    ]).to_list(length=1)
+    
+    if not results:
+        return None, None
+    
+    quiz = results[0]
+    courses = quiz.pop("course")
+    return quiz, courses[0] if courses else None
+
 @router.post("/", response_model=Quiz)
 async def create_quiz(
     quiz_in: QuizCreate,
@@ -23,16 +104,17 @@ async def create_quiz(
     Create a new quiz.
     """
     db: AsyncIOMotorDatabase = request.app.mongodb
+    uid = oid(current_user.id)
     
     # Verify course exists and user is the teacher
-    course = await db.courses.find_one({"_id": ObjectId(quiz_in.course_id)})
+    course = await db.courses.find_one({"_id": oid(quiz_in.course_id)}, {"teacher_id": 1})
     if not course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found"
         )
     
-    if course["teacher_id"] != ObjectId(current_user.id) and current_user.role != "admin":
+    if course["teacher_id"] != uid and current_user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not the teacher of this course"
@@ -40,11 +122,13 @@ async def create_quiz(
     
     quiz = QuizInDB(
         **quiz_in.dict(),
-        created_by=ObjectId(current_user.id)
+        created_by=uid
     )
     
     result = await db.quizzes.insert_one(quiz.dict(by_alias=True))
     quiz.id = result.inserted_id
+    invalidate_course_totals(quiz.course_id)
+    response_cache.invalidate("quizzes", str(quiz.course_id))
     
     return quiz
 
@@ -58,26 +142,39 @@ async def list_course_quizzes(
     List all quizzes for a course.
     """
     db: AsyncIOMotorDatabase = request.app.mongodb
+    cid = oid(course_id)
     
     # Verify course exists and user has access
-    course = await db.courses.find_one({"_id": ObjectId(course_id)})
+    # Only transfer the current user's entry in the students list
+    course = await db.courses.find_one(
+        {"_id": cid},
+        {"students": {"$elemMatch": {"$eq": oid(current_user.id)}}}
+    )
     if not course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found"
         )
     
-    if current_user.role == "student" and ObjectId(current_user.id) not in course["students"]:
+    if current_user.role == "student" and not course.get("students"):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enrolled in this course"
         )
     
-    quizzes = await db.quizzes.find(
-        {"course_id": ObjectId(course_id)}
-    ).to_list(length=None)
+    quizzes = response_cache.get("quizzes", str(cid))
+    if quizzes is None:
+        quizzes = await db.quizzes.find(
+            {"course_id": cid}
+        ).to_list(length=None)
+        quizzes = _QUIZ_LIST_ADAPTER.validate_python(quizzes)
+        response_cache.set("quizzes", str(cid), quizzes)
     
-    return quizzes
+    # Already validated; serialize directly instead of re-validating against response_model
+    return Response(
+        content=_QUIZ_LIST_ADAPTER.dump_json(quizzes, by_alias=True),
+        media_type="application/json"
+    )
 
 @router.get("/{quiz_id}", response_model=Quiz)
 async def get_quiz(
@@ -90,7 +187,7 @@ async def get_quiz(
     """
     db: AsyncIOMotorDatabase = request.app.mongodb
     
-    quiz = await db.quizzes.find_one({"_id": ObjectId(quiz_id)})
+    quiz, course = await get_quiz_with_course(db, quiz_id, oid(current_user.id))
     if not quiz:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -98,8 +195,7 @@ async def get_quiz(
         )
     
     # Verify course access
-    course = await db.courses.find_one({"_id": quiz["course_id"]})
-    if current_user.role == "student" and ObjectId(current_user.id) not in course["students"]:
+    if current_user.role == "student" and not course.get("students"):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enrolled in this course"
@@ -119,7 +215,7 @@ async def submit_quiz(
     """
     db: AsyncIOMotorDatabase = request.app.mongodb
     
-    quiz = await db.quizzes.find_one({"_id": ObjectId(quiz_id)})
+    quiz, course = await get_quiz_with_course(db, quiz_id, oid(current_user.id))
     if not quiz:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -127,8 +223,7 @@ async def submit_quiz(
         )
     
     # Verify course access
-    course = await db.courses.find_one({"_id": quiz["course_id"]})
-    if current_user.role == "student" and ObjectId(current_user.id) not in course["students"]:
+    if current_user.role == "student" and not course.get("students"):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enrolled in this course"
@@ -138,6 +233,7 @@ async def submit_quiz(
     score = 0
     total_points = 0
     feedback = []
+    descriptive = []
     
     for question in quiz["questions"]:
         total_points += question["points"]
@@ -151,21 +247,25 @@ async def submit_quiz(
                 if student_answer == question["correct_answer"]:
                     score += question["points"]
             elif question["type"] in ["short", "long"]:
-                # Use AI to evaluate descriptive answers
-                try:
-                    response = openai.ChatCompletion.create(
-                        model="gpt-3.5-turbo",
-                        messages=[
-                            {"role": "system", "content": "You are an educational assistant evaluating student answers."},
-                            {"role": "user", "content": f"Question: {question['question']}\nCorrect Answer: {question['correct_answer']}\nStudent Answer: {student_answer}\nEvaluate the answer and provide a score out of {question['points']} points."}
-                        ]
-                    )
-                    evaluation = response.choices[0].message.content
-                    # Extract score from evaluation (you might want to improve this parsing)
-                    score += float(evaluation.split("score:")[-1].strip().split()[0])
-                    feedback.append(f"Q: {question['question']}\nA: {student_answer}\nFeedback: {evaluation}")
-                except Exception as e:
-                    feedback.append(f"Error evaluating answer: {str(e)}")
+                descriptive.append((question, student_answer))
+    
+    # Use AI to evaluate descriptive answers, all at once
+    evaluations = await asyncio.gather(*[
+        json_completion([
+            {"role": "system", "content": "You are an educational assistant evaluating student answers. Respond with a JSON object of the form {\"score\": <number>, \"feedback\": <string>}."},
+            {"role": "user", "content": f"Question: {question['question']}\nCorrect Answer: {question['correct_answer']}\nStudent Answer: {student_answer}\nEvaluate the answer and provide a score out of {question['points']} points."}
+        ])
+        for question, student_answer in descriptive
+    ], return_exceptions=True)
+    
+    for (question, student_answer), evaluation in zip(descriptive, evaluations):
+        try:
+            if isinstance(evaluation, Exception):
+                raise evaluation
+            score += min(max(float(evaluation["score"]), 0), question["points"])
+            feedback.append(f"Q: {question['question']}\nA: {student_answer}\nFeedback: {evaluation.get('feedback', '')}")
+        except Exception as e:
+            feedback.append(f"Error evaluating answer: {str(e)}")
     
     submission.score = (score / total_points) * 100 if total_points > 0 else 0
     submission.feedback = "\n\n".join(feedback)
@@ -187,16 +287,21 @@ async def generate_quiz(
     Generate a quiz using AI.
     """
     db: AsyncIOMotorDatabase = request.app.mongodb
+    cid = oid(course_id)
+    uid = oid(current_user.id)
     
     # Verify course exists and user is the teacher
-    course = await db.courses.find_one({"_id": ObjectId(course_id)})
+    course = await db.courses.find_one(
+        {"_id": cid},
+        {"title": 1, "teacher_id": 1, "materials.title": 1, "materials.description": 1}
+    )
     if not course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found"
         )
     
-    if course["teacher_id"] != ObjectId(current_user.id) and current_user.role != "admin":
+    if course["teacher_id"] != uid and current_user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not the teacher of this course"
@@ -210,28 +315,28 @@ async def generate_quiz(
     
     try:
         # Generate quiz using OpenAI
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are an educational assistant creating quizzes."},
-                {"role": "user", "content": f"Create a quiz with {num_questions} questions based on this course material:\n\n{materials_text}\n\nGenerate a mix of multiple-choice and short-answer questions."}
-            ]
-        )
+        generated = await json_completion([
+            {"role": "system", "content": "You are an educational assistant creating quizzes. Respond with a JSON object of the form {\"questions\": [{\"question\": <string>, \"type\": \"mcq\" | \"short\" | \"long\", \"options\": [<string>] | null, \"correct_answer\": <string>, \"points\": <integer>}]}."},
+            {"role": "user", "content": f"Create a quiz with {num_questions} questions based on this course material:\n\n{materials_text}\n\nGenerate a mix of multiple-choice and short-answer questions."}
+        ])
         
-        # Parse the generated quiz (you'll need to implement proper parsing)
-        generated_quiz = response.choices[0].message.content
+        # Parse the generated questions
+        questions = [Question.model_validate(q) for q in generated["questions"]]
         
         # Create quiz object
         quiz = QuizInDB(
             title=f"AI Generated Quiz - {course['title']}",
             description="Quiz generated using AI based on course materials",
-            course_id=ObjectId(course_id),
-            created_by=ObjectId(current_user.id),
-            questions=[]  # You'll need to parse the generated questions
+            course_id=cid,
+            created_by=uid,
+            questions=questions,
+            total_points=sum(q.points for q in questions)
         )
         
         result = await db.quizzes.insert_one(quiz.dict(by_alias=True))
         quiz.id = result.inserted_id
+        invalidate_course_totals(quiz.course_id)
+        response_cache.invalidate("quizzes", str(quiz.course_id))
         
         return quiz
         
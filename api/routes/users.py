@@ -1,9 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from typing import List, Any
-from models.user import User, UserInDB
+from models.user import User, UserInDB, USER_LIST_ADAPTER
 from utils.auth import get_current_user, check_admin_permission
+from backend.api.dependencies import invalidate_cached_user, oid
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from bson import ObjectId
 
 router = APIRouter()
 
@@ -17,7 +17,11 @@ async def list_users(
     """
     db: AsyncIOMotorDatabase = request.app.mongodb
     users = await db.users.find().to_list(length=None)
-    return users
+    # Validate once and serialize directly instead of re-validating against response_model
+    return Response(
+        content=USER_LIST_ADAPTER.dump_json(USER_LIST_ADAPTER.validate_python(users), by_alias=True),
+        media_type="application/json"
+    )
 
 @router.get("/{user_id}", response_model=User)
 async def get_user(
@@ -31,7 +35,7 @@ async def get_user(
     db: AsyncIOMotorDatabase = request.app.mongodb
     
     # Check if user exists
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
+    user = await db.users.find_one({"_id": oid(user_id)})
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -58,9 +62,10 @@ async def update_user(
     Update a user.
     """
     db: AsyncIOMotorDatabase = request.app.mongodb
+    user_oid = oid(user_id)
     
     # Check if user exists
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
+    user = await db.users.find_one({"_id": user_oid})
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -77,11 +82,12 @@ async def update_user(
     # Update user
     update_data = user_in.dict(exclude_unset=True)
     await db.users.update_one(
-        {"_id": ObjectId(user_id)},
+        {"_id": user_oid},
         {"$set": update_data}
     )
+    invalidate_cached_user(user_id)
     
-    updated_user = await db.users.find_one({"_id": ObjectId(user_id)})
+    updated_user = await db.users.find_one({"_id": user_oid})
     return updated_user
 
 @router.delete("/{user_id}")
@@ -94,9 +100,10 @@ async def delete_user(
     Delete a user (admin only).
     """
     db: AsyncIOMotorDatabase = request.app.mongodb
+    user_oid = oid(user_id)
     
     # Check if user exists
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
+    user = await db.users.find_one({"_id": user_oid})
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -104,6 +111,7 @@ async def delete_user(
         )
     
     # Delete user
-    await db.users.delete_one({"_id": ObjectId(user_id)})
+    await db.users.delete_one({"_id": user_oid})
+    invalidate_cached_user(user_id)
     
     return {"message": "User deleted successfully"} 
\ No newline at end of file
@@ -1,10 +1,9 @@
 import secrets
-import base64
 
 # Generate a secure random key
 def generate_jwt_secret():
-    # Generate 32 random bytes and encode them in base64
-    return base64.b64encode(secrets.token_bytes(32)).decode('utf-8')
+    # Generate 32 random bytes, URL-safe base64 encoded
+    return secrets.token_urlsafe(32)
 
 if __name__ == "__main__":
     secret_key = generate_jwt_secret()
@@ -14,4 +13,4 @@ if __name__ == "__main__":
     print("=" * 50)
     print("\nAdd this to your .env file as:")
     print(f"SECRET_KEY={secret_key}")
-    print("\nMake sure to keep this key secure and don't share it!") 
\ No newline at end of file
+    print("\nMake sure to keep this key secure and don't share it!")
@@ -1,7 +1,10 @@
+import asyncio
+import contextlib
+import orjson
 import os
 import sys
-from fastapi import FastAPI, Request
-from fastapi.middleware.cors import CORSMiddleware
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
@@ -20,6 +23,8 @@ from backend.api.routes import (
     admin_router,
     ai_router
 )
+from backend.api.routes.materials import run_view_flusher
+from backend.api.middleware import FastCORS, RequestTimeMiddleware, StreamSafeGZip
 from backend.utils.db import get_database, init_indexes, close_db_connection
 from backend.utils.ai_helpers import AIHelper
 
@@ -31,6 +36,30 @@ origins = [
     "http://127.0.0.1:3000",
 ]
 
+# Routers mounted by create_app, as (router, prefix, tag)
+_ROUTER_SPECS = (
+    (auth_router, "/api/auth", "Authentication"),
+    (users_router, "/api/users", "Users"),
+    (courses_router, "/api/courses", "Courses"),
+    (quizzes_router, "/api/quizzes", "Quizzes"),
+    (chat_router, "/api/chat", "Chat"),
+    (materials_router, "/api/materials", "Materials"),
+    (progress_router, "/api/progress", "Progress"),
+    (admin_router, "/api/admin", "Admin"),
+    (ai_router, "/api/ai", "AI"),
+)
+
+# Bodies of the root and health endpoints, encoded once
+_ROOT_BYTES = orjson.dumps({
+    "message": "Welcome to the AI-Powered Learning Management System API",
+    "docs_url": "/docs",
+    "redoc_url": "/redoc"
+})
+_HEALTH_BYTES = orjson.dumps({
+    "status": "healthy",
+    "version": "1.0.0"
+})
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Initialize database connection and indexes
@@ -43,9 +72,15 @@ async def lifespan(app: FastAPI):
     # Initialize AI helper
     app.state.ai_helper = AIHelper(db)
     
+    # Start writing buffered material views in the background
+    view_flusher = asyncio.create_task(run_view_flusher(db))
+    
     yield
     
     # Cleanup
+    view_flusher.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await view_flusher
     await close_db_connection()
 
 def create_app() -> FastAPI:
@@ -53,13 +88,21 @@ def create_app() -> FastAPI:
         title="AI-Powered Learning Management System",
         description="A modern LMS with AI-enhanced features for personalized learning",
         version="1.0.0",
-        lifespan=lifespan
+        lifespan=lifespan,
+        # Encode JSON responses with orjson instead of the stdlib json module
+        default_response_class=ORJSONResponse
     )
 
+    # Middleware must be pure ASGI: subclass api.middleware.ASGIMiddleware
+    # rather than using BaseHTTPMiddleware or @app.middleware("http")
+
+    # One timestamp per request for model created_at/updated_at defaults
+    app.add_middleware(RequestTimeMiddleware)
+
     # Configure CORS with specific settings
     app.add_middleware(
-        CORSMiddleware,
-        allow_origins=origins,
+        FastCORS,
+        origins=origins,
         allow_credentials=True,
         allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
         allow_headers=[
@@ -73,31 +116,28 @@ def create_app() -> FastAPI:
         max_age=3600,
     )
 
+    # Compress larger responses; added after CORS so it wraps it and CORS
+    # headers are set before the body is compressed. The AI routes stream
+    # their completions and are left uncompressed.
+    app.add_middleware(
+        StreamSafeGZip,
+        exclude_paths=("/api/ai",),
+        minimum_size=1024,
+        compresslevel=5
+    )
+
     # Include routers with proper prefixes and tags
-    app.include_router(auth_router, prefix="/api/auth", tags=["Authentication"])
-    app.include_router(users_router, prefix="/api/users", tags=["Users"])
-    app.include_router(courses_router, prefix="/api/courses", tags=["Courses"])
-    app.include_router(quizzes_router, prefix="/api/quizzes", tags=["Quizzes"])
-    app.include_router(chat_router, prefix="/api/chat", tags=["Chat"])
-    app.include_router(materials_router, prefix="/api/materials", tags=["Materials"])
-    app.include_router(progress_router, prefix="/api/progress", tags=["Progress"])
-    app.include_router(admin_router, prefix="/api/admin", tags=["Admin"])
-    app.include_router(ai_router, prefix="/api/ai", tags=["AI"])
-
-    @app.get("/")
+    for router, prefix, tag in _ROUTER_SPECS:
+        app.include_router(router, prefix=prefix, tags=[tag])
+
+    # Constant bodies, served without per-request serialization
+    @app.get("/", response_class=Response)
     async def root():
-        return {
-            "message": "Welcome to the AI-Powered Learning Management System API",
-            "docs_url": "/docs",
-            "redoc_url": "/redoc"
-        }
+        return Response(content=_ROOT_BYTES, media_type="application/json")
 
-    @app.get("/health")
+    @app.get("/health", response_class=Response)
     async def health_check():
-        return {
-            "status": "healthy",
-            "version": "1.0.0"
-        }
+        return Response(content=_HEALTH_BYTES, media_type="application/json")
 
     return app
 
@@ -110,4 +150,18 @@ async def get_db(request: Request) -> AsyncIOMotorDatabase:
 
 # Dependency to get AI helper from app state
 async def get_ai_helper(request: Request) -> AIHelper:
-    return request.app.state.ai_helper 
\ No newline at end of file
+    return request.app.state.ai_helper
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # uvloop event loop and httptools HTTP parser, both installed by uvicorn[standard].
+    # Equivalent command: uvicorn backend.main:app --loop uvloop --http httptools --workers N
+    uvicorn.run(
+        app,
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8000")),
+        loop="uvloop",
+        http="httptools"
+    )
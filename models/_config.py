@@ -0,0 +1,22 @@
+from pydantic import ConfigDict
+
+# Shared model configurations, so models in the same category reuse one config
+
+# Models that mirror MongoDB documents
+DB_CONFIG = ConfigDict(
+    populate_by_name=True,
+    arbitrary_types_allowed=True
+)
+
+# Models returned to API clients
+RESPONSE_CONFIG = ConfigDict(
+    populate_by_name=True,
+    from_attributes=True
+)
+
+# Models that mirror MongoDB documents and are also returned to API clients
+DB_RESPONSE_CONFIG = ConfigDict(
+    populate_by_name=True,
+    arbitrary_types_allowed=True,
+    from_attributes=True
+)
\ No newline at end of file
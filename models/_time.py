@@ -0,0 +1,13 @@
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Optional
+
+# Timestamp taken once at the start of the current request, if any
+request_time: ContextVar[Optional[datetime]] = ContextVar("request_time", default=None)
+
+def _now() -> datetime:
+    """
+    Default for timestamp fields: the current request's timestamp, so every model
+    built while handling it shares one value, or the current time outside a request.
+    """
+    return request_time.get() or datetime.utcnow()
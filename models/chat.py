@@ -3,33 +3,29 @@ from typing import Optional, Any
 from datetime import datetime
 from bson import ObjectId
 from .user import PyObjectId
+from ._config import DB_CONFIG
+from ._time import _now
 
 class Message(BaseModel):
     id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
     course_id: PyObjectId
     sender_id: PyObjectId
     text: str
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=_now)
     is_pinned: bool = False
     reply_to: Optional[PyObjectId] = None
 
-    model_config = {
-        "populate_by_name": True,
-        "arbitrary_types_allowed": True
-    }
+    model_config = DB_CONFIG
 
 class ChatRoom(BaseModel):
     id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
     course_id: PyObjectId
     name: str
     description: Optional[str] = None
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=_now)
     is_active: bool = True
 
-    model_config = {
-        "populate_by_name": True,
-        "arbitrary_types_allowed": True
-    }
+    model_config = DB_CONFIG
 
 class MessageCreate(BaseModel):
     text: str
@@ -41,4 +37,11 @@ class MessageCreate(BaseModel):
 
 class MessageResponse(Message):
     sender_name: str
-    course_name: str 
\ No newline at end of file
+    course_name: str
+
+    @classmethod
+    def from_mongo(cls, doc: dict, sender_name: str, course_name: str) -> "MessageResponse":
+        """
+        Build a response from a stored message document without re-validating it.
+        """
+        return cls.model_construct(**doc, sender_name=sender_name, course_name=course_name) 
\ No newline at end of file
@@ -3,6 +3,8 @@ from typing import List, Optional, Any
 from datetime import datetime
 from bson import ObjectId
 from .user import PyObjectId
+from ._config import DB_CONFIG, RESPONSE_CONFIG
+from ._time import _now
 
 class Material(BaseModel):
     id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
@@ -10,12 +12,9 @@ class Material(BaseModel):
     url: str
     title: str
     description: Optional[str] = None
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=_now)
 
-    model_config = {
-        "populate_by_name": True,
-        "arbitrary_types_allowed": True
-    }
+    model_config = DB_CONFIG
 
 class CourseBase(BaseModel):
     title: str
@@ -30,13 +29,10 @@ class CourseInDB(CourseBase):
     id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
     students: List[PyObjectId] = []
     materials: List[Material] = []
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=_now)
+    updated_at: datetime = Field(default_factory=_now)
 
-    model_config = {
-        "populate_by_name": True,
-        "arbitrary_types_allowed": True
-    }
+    model_config = DB_CONFIG
 
 class Course(CourseBase):
     id: str = Field(alias="_id")
@@ -45,6 +41,16 @@ class Course(CourseBase):
     created_at: datetime
     updated_at: datetime
 
-    model_config = {
-        "populate_by_name": True
-    } 
\ No newline at end of file
+    model_config = RESPONSE_CONFIG
+
+    @classmethod
+    def from_mongo(cls, doc: dict) -> "Course":
+        """
+        Build a response from a stored course document without re-validating it.
+        """
+        return cls.model_construct(
+            **{k: v for k, v in doc.items() if k not in ("_id", "students", "materials")},
+            id=str(doc["_id"]),
+            students=[str(student) for student in doc.get("students", [])],
+            materials=[Material.model_construct(**material) for material in doc.get("materials", [])]
+        ) 
\ No newline at end of file
@@ -1,8 +1,9 @@
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field
 from typing import Optional, List, Any
 from datetime import datetime
-from bson import ObjectId
 from .user import PyObjectId
+from ._config import DB_CONFIG, RESPONSE_CONFIG
+from ._time import _now
 
 class MaterialBase(BaseModel):
     title: str
@@ -20,17 +21,13 @@ class MaterialCreate(MaterialBase):
 class MaterialInDB(MaterialBase):
     id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
     created_by: PyObjectId
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=_now)
+    updated_at: datetime = Field(default_factory=_now)
     views: int = 0
     likes: int = 0
     is_published: bool = True
 
-    model_config = ConfigDict(
-        populate_by_name=True,
-        arbitrary_types_allowed=True,
-        json_encoders={ObjectId: str}
-    )
+    model_config = DB_CONFIG
 
 class Material(MaterialBase):
     id: str = Field(alias="_id")
@@ -41,7 +38,15 @@ class Material(MaterialBase):
     likes: int
     is_published: bool
 
-    model_config = ConfigDict(
-        populate_by_name=True,
-        from_attributes=True
-    ) 
\ No newline at end of file
+    model_config = RESPONSE_CONFIG
+
+    @classmethod
+    def from_mongo(cls, doc: dict) -> "Material":
+        """
+        Build a response from a stored material document without re-validating it.
+        """
+        return cls.model_construct(
+            **{k: v for k, v in doc.items() if k not in ("_id", "created_by")},
+            id=str(doc["_id"]),
+            created_by=str(doc["created_by"])
+        ) 
\ No newline at end of file
@@ -3,6 +3,8 @@ from typing import List, Optional, Union, Any
 from datetime import datetime
 from bson import ObjectId
 from .user import PyObjectId
+from ._config import DB_CONFIG, RESPONSE_CONFIG
+from ._time import _now
 
 class Question(BaseModel):
     question: str
@@ -27,14 +29,11 @@ class QuizCreate(QuizBase):
 class QuizInDB(QuizBase):
     id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
     created_by: PyObjectId
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=_now)
+    updated_at: datetime = Field(default_factory=_now)
     total_points: int = 0
 
-    model_config = {
-        "populate_by_name": True,
-        "arbitrary_types_allowed": True
-    }
+    model_config = DB_CONFIG
 
 class Quiz(QuizBase):
     id: str = Field(alias="_id")
@@ -43,19 +42,14 @@ class Quiz(QuizBase):
     updated_at: datetime
     total_points: int
 
-    model_config = {
-        "populate_by_name": True
-    }
+    model_config = RESPONSE_CONFIG
 
 class QuizSubmission(BaseModel):
     quiz_id: PyObjectId
     student_id: PyObjectId
     answers: List[dict]  # List of {question_id: answer}
-    submitted_at: datetime = Field(default_factory=datetime.utcnow)
+    submitted_at: datetime = Field(default_factory=_now)
     score: Optional[float] = None
     feedback: Optional[str] = None
 
-    model_config = {
-        "populate_by_name": True,
-        "arbitrary_types_allowed": True
-    } 
\ No newline at end of file
+    model_config = DB_CONFIG 
\ No newline at end of file
@@ -2,6 +2,8 @@ from datetime import datetime
 from typing import List, Dict, Any
 from pydantic import BaseModel, Field, ConfigDict
 from .user import PyObjectId
+from ._config import DB_CONFIG
+from ._time import _now
 
 class QuizAnswer(BaseModel):
     question_id: PyObjectId
@@ -11,7 +13,7 @@ class QuizAnswer(BaseModel):
 
 class QuizSubmission(BaseModel):
     model_config = ConfigDict(
-        arbitrary_types_allowed=True,
+        **DB_CONFIG,
         json_schema_extra={
             "example": {
                 "user_id": "64f5a25e3f6b3c2a1d8b4567",
@@ -44,9 +46,9 @@ class QuizSubmission(BaseModel):
     time_taken: int = Field(default=0, description="Time taken in seconds")
     status: str = Field(default="in_progress", pattern="^(in_progress|completed|abandoned)$")
     feedback: Dict[str, Any] = Field(default_factory=dict)
-    submitted_at: datetime = Field(default_factory=datetime.utcnow)
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    submitted_at: datetime = Field(default_factory=_now)
+    created_at: datetime = Field(default_factory=_now)
+    updated_at: datetime = Field(default_factory=_now)
 
     class Collection:
         name = "quiz_submissions" 
\ No newline at end of file
@@ -1,8 +1,41 @@
-from pydantic import BaseModel, EmailStr, Field, ConfigDict
+from pydantic import BaseModel, EmailStr, Field, ConfigDict, TypeAdapter
 from typing import List, Optional, Any
 from datetime import datetime
 from bson import ObjectId
+from bson.errors import InvalidId
+from functools import lru_cache
 from pydantic_core import core_schema
+from ._config import DB_CONFIG, DB_RESPONSE_CONFIG
+from ._time import _now
+
+@lru_cache(maxsize=65536)
+def oid(value: str) -> ObjectId:
+    """
+    Convert an id string to an ObjectId, reusing previously parsed ids.
+    ObjectIds are immutable, so cached instances are safe to share.
+    """
+    return ObjectId(value)
+
+def _validate_object_id(value: str) -> ObjectId:
+    # Only strings reach here; ObjectId inputs take the is_instance_schema arm
+    try:
+        return oid(value)
+    except InvalidId:
+        raise ValueError("Invalid ObjectId")
+
+# Built once and shared by every model with an ObjectId field
+_PYOBJECTID_SCHEMA = core_schema.json_or_python_schema(
+    json_schema=core_schema.str_schema(),
+    python_schema=core_schema.union_schema([
+        core_schema.is_instance_schema(ObjectId),
+        core_schema.chain_schema([
+            core_schema.str_schema(),
+            core_schema.no_info_plain_validator_function(_validate_object_id),
+        ])
+    ]),
+    # str() compiled into the JSON serializer; Python dumps keep the ObjectId for MongoDB
+    serialization=core_schema.plain_serializer_function_ser_schema(str, when_used="json"),
+)
 
 class PyObjectId(str):
     @classmethod
@@ -11,25 +44,11 @@ class PyObjectId(str):
         _source_type: Any,
         _handler: Any
     ) -> core_schema.CoreSchema:
-        return core_schema.json_or_python_schema(
-            json_schema=core_schema.str_schema(),
-            python_schema=core_schema.union_schema([
-                core_schema.is_instance_schema(ObjectId),
-                core_schema.chain_schema([
-                    core_schema.str_schema(),
-                    core_schema.no_info_plain_validator_function(cls.validate),
-                ])
-            ]),
-            serialization=core_schema.plain_serializer_function_ser_schema(
-                lambda x: str(x) if isinstance(x, ObjectId) else x
-            ),
-        )
+        return _PYOBJECTID_SCHEMA
 
     @classmethod
     def validate(cls, value) -> ObjectId:
-        if not ObjectId.is_valid(value):
-            raise ValueError("Invalid ObjectId")
-        return ObjectId(value)
+        return _validate_object_id(value)
 
 class UserBase(BaseModel):
     email: EmailStr
@@ -42,19 +61,15 @@ class UserCreate(UserBase):
 class UserInDB(UserBase):
     id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
     hashed_password: str
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=_now)
+    updated_at: datetime = Field(default_factory=_now)
     last_login: Optional[datetime] = None
     enrolled_courses: List[PyObjectId] = Field(default_factory=list)
     is_active: bool = True
     is_instructor: bool = Field(default=False)
     is_admin: bool = Field(default=False)
 
-    model_config = ConfigDict(
-        populate_by_name=True,
-        arbitrary_types_allowed=True,
-        json_encoders={ObjectId: str}
-    )
+    model_config = DB_CONFIG
 
 class User(UserBase):
     id: PyObjectId = Field(alias="_id")
@@ -66,12 +81,10 @@ class User(UserBase):
     is_instructor: bool = False
     is_admin: bool = False
 
-    model_config = ConfigDict(
-        populate_by_name=True,
-        from_attributes=True,
-        arbitrary_types_allowed=True,
-        json_encoders={ObjectId: str}
-    )
+    model_config = DB_RESPONSE_CONFIG
+
+# Validates and serializes user listings in a single pydantic-core call
+USER_LIST_ADAPTER = TypeAdapter(List[User])
 
 class Token(BaseModel):
     access_token: str
@@ -2,10 +2,12 @@ from datetime import datetime
 from typing import Optional, List
 from pydantic import BaseModel, Field, ConfigDict
 from .user import PyObjectId
+from ._config import DB_CONFIG
+from ._time import _now
 
 class UserProgress(BaseModel):
     model_config = ConfigDict(
-        arbitrary_types_allowed=True,
+        **DB_CONFIG,
         json_schema_extra={
             "example": {
                 "user_id": "64f5a25e3f6b3c2a1d8b4567",
@@ -27,10 +29,10 @@ class UserProgress(BaseModel):
     completed_quizzes: List[PyObjectId] = Field(default_factory=list)
     current_material: Optional[PyObjectId] = None
     progress_percentage: float = Field(default=0.0, ge=0.0, le=100.0)
-    last_accessed: datetime = Field(default_factory=datetime.utcnow)
+    last_accessed: datetime = Field(default_factory=_now)
     time_spent: int = Field(default=0, description="Time spent in seconds")
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=_now)
+    updated_at: datetime = Field(default_factory=_now)
 
     class Collection:
         name = "user_progress" 
\ No newline at end of file
@@ -1,24 +1,73 @@
 from typing import List, Dict, Any, Optional
-import openai
+from openai import AsyncOpenAI
+import hashlib
 import os
 from dotenv import load_dotenv
 from datetime import datetime
-import json
+import orjson
+from cachetools import LRUCache
 import asyncio
+from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 # Load environment variables
 load_dotenv()
 
 # OpenAI configuration
-openai.api_key = os.getenv("OPENAI_API_KEY")
 DEFAULT_MODEL = "gpt-4-turbo-preview"
 EMBEDDING_MODEL = "text-embedding-3-small"
 
+# Shared OpenAI client, created on first use
+_openai_client: Optional[AsyncOpenAI] = None
+
+def get_openai_client() -> AsyncOpenAI:
+    """
+    Return the process-wide OpenAI client, creating it on first use.
+    The client requires an API key, so building it lazily lets the app
+    start and serve non-AI routes without one.
+    """
+    global _openai_client
+    if _openai_client is None:
+        _openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _openai_client
+
+# Number of raw completions kept for prompts that are pure functions of their input
+COMPLETION_CACHE_SIZE = 512
+
 class AIHelper:
     def __init__(self, db: AsyncIOMotorDatabase):
         self.db = db
         self.model = DEFAULT_MODEL
+        # Raw JSON text, parsed on every hit so callers never share a mutable result
+        self._cache: LRUCache = LRUCache(maxsize=COMPLETION_CACHE_SIZE)
+    
+    async def _json_completion(self, system: str, prompt: str, cache: bool = False) -> Any:
+        """
+        Run a chat completion in JSON mode and return the parsed object.
+        With cache=True, identical prompts are answered from an in-process LRU.
+        """
+        if cache:
+            key = hashlib.blake2b(
+                f"{self.model}\0{system}\0{prompt}".encode(), digest_size=16
+            ).hexdigest()
+            cached = self._cache.get(key)
+            if cached is not None:
+                return orjson.loads(cached)
+        
+        response = await get_openai_client().chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt}
+            ],
+            response_format={"type": "json_object"}
+        )
+        content = response.choices[0].message.content
+        result = orjson.loads(content)
+        
+        if cache:
+            self._cache[key] = content
+        return result
     
     async def generate_course_outline(self, title: str, description: str) -> Dict[str, Any]:
         """
@@ -40,15 +89,11 @@ class AIHelper:
         """
         
         try:
-            response = await openai.ChatCompletion.acreate(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert curriculum designer."},
-                    {"role": "user", "content": prompt}
-                ]
+            return await self._json_completion(
+                "You are an expert curriculum designer.",
+                prompt,
+                cache=True
             )
-            
-            return json.loads(response.choices[0].message.content)
         except Exception as e:
             print(f"Error generating course outline: {e}")
             return None
@@ -73,19 +118,16 @@ class AIHelper:
         3. Correct answer
         4. Explanation
         
-        Format the response as a JSON array of question objects.
+        Format the response as a JSON object with a "questions" array of question objects.
         """
         
         try:
-            response = await openai.ChatCompletion.acreate(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert assessment creator."},
-                    {"role": "user", "content": prompt}
-                ]
+            generated = await self._json_completion(
+                "You are an expert assessment creator.",
+                prompt,
+                cache=True
             )
-            
-            return json.loads(response.choices[0].message.content)
+            return generated["questions"]
         except Exception as e:
             print(f"Error generating quiz questions: {e}")
             return None
@@ -99,28 +141,40 @@ class AIHelper:
         Get personalized learning recommendations based on user progress.
         """
         # Get user progress and course data
-        progress = await self.db.user_progress.find_one({
-            "user_id": user_id,
-            "course_id": course_id
-        })
+        progress = await self.db.user_progress.find_one(
+            {
+                "user_id": user_id,
+                "course_id": course_id
+            },
+            projection={"completed_materials": 1, "completed_quizzes": 1}
+        )
         
         if not progress:
             return []
         
-        # Get completed materials and quizzes
-        completed_materials = progress.get("completed_materials", [])
-        completed_quizzes = progress.get("completed_quizzes", [])
+        # Get completed materials and quizzes, as ObjectIds to match the stored _ids;
+        # deduplicated so $nin gets the shortest list
+        completed_materials = list({ObjectId(m) for m in progress.get("completed_materials", [])})
+        completed_quizzes = list({ObjectId(q) for q in progress.get("completed_quizzes", [])})
         
-        # Get course materials and quizzes
-        materials = await self.db.materials.find({
-            "course_id": course_id,
-            "_id": {"$nin": completed_materials}
-        }).to_list(None)
-        
-        quizzes = await self.db.quizzes.find({
-            "course_id": course_id,
-            "_id": {"$nin": completed_quizzes}
-        }).to_list(None)
+        # Get only the few course materials and quizzes that are recommended,
+        # with just the fields the recommendations use
+        materials, quizzes = await asyncio.gather(
+            self.db.materials.find(
+                {
+                    "course_id": course_id,
+                    "_id": {"$nin": completed_materials}
+                },
+                projection={"title": 1, "is_prerequisite": 1}
+            ).sort("is_prerequisite", -1).limit(3).to_list(3),
+            self.db.quizzes.find(
+                {
+                    "course_id": course_id,
+                    "_id": {"$nin": completed_quizzes}
+                },
+                projection={"title": 1, "difficulty": 1}
+            ).limit(2).to_list(2)
+        )
         
         # Generate recommendations
         recommendations = []
@@ -134,7 +188,7 @@ class AIHelper:
                         "title": material["title"],
                         "priority": "high" if material.get("is_prerequisite") else "normal"
                     }
-                    for material in materials[:3]
+                    for material in materials
                 ]
             })
         
@@ -147,7 +201,7 @@ class AIHelper:
                         "title": quiz["title"],
                         "difficulty": quiz.get("difficulty", "medium")
                     }
-                    for quiz in quizzes[:2]
+                    for quiz in quizzes
                 ]
             })
         
@@ -161,24 +215,36 @@ class AIHelper:
         """
         Analyze user's quiz performance and provide feedback.
         """
-        submission = await self.db.quiz_submissions.find_one({
-            "user_id": user_id,
-            "quiz_id": quiz_id,
-            "status": "completed"
-        })
-        
-        if not submission:
-            return None
+        # Get the submission and quiz details concurrently
+        submission, quiz = await asyncio.gather(
+            self.db.quiz_submissions.find_one(
+                {
+                    "user_id": user_id,
+                    "quiz_id": quiz_id,
+                    "status": "completed"
+                },
+                # Answers are counted server-side; only the totals are returned
+                projection={
+                    "total_score": 1,
+                    "max_score": 1,
+                    "total_questions": {"$size": "$answers"},
+                    "correct_answers": {
+                        "$size": {
+                            "$filter": {"input": "$answers", "cond": "$$this.is_correct"}
+                        }
+                    }
+                }
+            ),
+            self.db.quizzes.find_one({"_id": quiz_id}, projection={"title": 1})
+        )
         
-        # Get quiz details
-        quiz = await self.db.quizzes.find_one({"_id": quiz_id})
-        if not quiz:
+        if not submission or not quiz:
             return None
         
         # Analyze performance
-        total_questions = len(submission["answers"])
-        correct_answers = len([a for a in submission["answers"] if a["is_correct"]])
-        performance_ratio = correct_answers / total_questions
+        total_questions = submission["total_questions"]
+        correct_answers = submission["correct_answers"]
+        performance_ratio = correct_answers / total_questions if total_questions else 0
         
         # Generate feedback
         prompt = f"""
@@ -197,15 +263,10 @@ class AIHelper:
         """
         
         try:
-            response = await openai.ChatCompletion.acreate(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert educational analyst."},
-                    {"role": "user", "content": prompt}
-                ]
+            analysis = await self._json_completion(
+                "You are an expert educational analyst.",
+                prompt
             )
-            
-            analysis = json.loads(response.choices[0].message.content)
             analysis["performance_metrics"] = {
                 "score": submission["total_score"],
                 "max_score": submission["max_score"],
@@ -236,15 +297,11 @@ class AIHelper:
         """
         
         try:
-            response = await openai.ChatCompletion.acreate(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert content summarizer."},
-                    {"role": "user", "content": prompt}
-                ]
+            return await self._json_completion(
+                "You are an expert content summarizer.",
+                prompt,
+                cache=True
             )
-            
-            return json.loads(response.choices[0].message.content)
         except Exception as e:
             print(f"Error generating content summary: {e}")
             return None
@@ -258,12 +315,20 @@ class AIHelper:
         """
         Generate a personalized study plan based on user progress and goals.
         """
-        # Get course and progress data
-        course = await self.db.courses.find_one({"_id": course_id})
-        progress = await self.db.user_progress.find_one({
-            "user_id": user_id,
-            "course_id": course_id
-        })
+        # Get course and progress data concurrently
+        course, progress = await asyncio.gather(
+            self.db.courses.find_one(
+                {"_id": course_id},
+                projection={"title": 1, "materials": 1, "quizzes": 1}
+            ),
+            self.db.user_progress.find_one(
+                {
+                    "user_id": user_id,
+                    "course_id": course_id
+                },
+                projection={"progress_percentage": 1, "completed_materials": 1, "completed_quizzes": 1}
+            )
+        )
         
         if not course or not progress:
             return None
@@ -290,15 +355,10 @@ class AIHelper:
         """
         
         try:
-            response = await openai.ChatCompletion.acreate(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert learning strategist."},
-                    {"role": "user", "content": prompt}
-                ]
+            return await self._json_completion(
+                "You are an expert learning strategist.",
+                prompt
             )
-            
-            return json.loads(response.choices[0].message.content)
         except Exception as e:
             print(f"Error generating study plan: {e}")
             return None 
\ No newline at end of file
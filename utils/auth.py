@@ -1,7 +1,7 @@
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+import jwt
+import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from motor.motor_asyncio import AsyncIOMotorDatabase
@@ -11,7 +11,7 @@ from backend.models.user import User
 from backend.utils.db import get_database
 
 # Password hashing settings
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+BCRYPT_ROUNDS = 12
 
 # JWT settings
 SECRET_KEY = "your-secret-key"  # Change this in production
@@ -25,10 +25,10 @@ oauth2_scheme = OAuth2PasswordBearer(
 )
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode()
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
@@ -54,7 +54,7 @@ async def get_current_user(
         user_id: str = payload.get("sub")
         if user_id is None:
             raise credentials_exception
-    except JWTError:
+    except jwt.PyJWTError:
         raise credentials_exception
     
     user = await db.users.find_one({"_id": ObjectId(user_id)})
@@ -63,7 +63,7 @@ async def get_current_user(
     
     return User.model_validate(user)
 
-def check_admin_permission(user: User = Depends(get_current_user)):
+async def check_admin_permission(user: User = Depends(get_current_user)):
     if user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -71,7 +71,7 @@ def check_admin_permission(user: User = Depends(get_current_user)):
         )
     return user
 
-def check_teacher_permission(user: User = Depends(get_current_user)):
+async def check_teacher_permission(user: User = Depends(get_current_user)):
     if user.role not in ["admin", "teacher"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -0,0 +1,30 @@
+from typing import Any, Hashable, Optional
+from cachetools import TTLCache
+
+class ResponseCache:
+    """
+    In-process TTL cache for read endpoints.
+    Entries are grouped by namespace so a write can drop everything it affects.
+    """
+    def __init__(self, maxsize: int = 4096, ttl: float = 60):
+        self._entries: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+    
+    def get(self, namespace: str, key: Hashable) -> Optional[Any]:
+        return self._entries.get((namespace, key))
+    
+    def set(self, namespace: str, key: Hashable, value: Any):
+        self._entries[(namespace, key)] = value
+    
+    def invalidate(self, namespace: str, key: Optional[Hashable] = None):
+        """
+        Drop a single entry, or every entry in the namespace when no key is given.
+        """
+        if key is not None:
+            self._entries.pop((namespace, key), None)
+            return
+        
+        for entry in [entry for entry in self._entries.keys() if entry[0] == namespace]:
+            self._entries.pop(entry, None)
+
+# Shared cache for course, quiz, material and progress reads
+response_cache = ResponseCache()
@@ -1,5 +1,7 @@
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import IndexModel
 from typing import Optional
+import asyncio
 import os
 from dotenv import load_dotenv
 from datetime import datetime
@@ -11,8 +13,19 @@ load_dotenv()
 MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "lms_db")
 
-# Global database instance
+# Connection pool settings
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "64"))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "8"))
+MONGODB_MAX_IDLE_TIME_MS = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "30000"))
+MONGODB_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "2500"))
+MONGODB_CONNECT_TIMEOUT_MS = int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "2000"))
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "2000"))
+# Wire compression, in order of preference; zstd needs the zstandard package
+MONGODB_COMPRESSORS = os.getenv("MONGODB_COMPRESSORS", "zstd,zlib")
+
+# Global database instance, created once under the lock
 _db: Optional[AsyncIOMotorDatabase] = None
+_db_lock = asyncio.Lock()
 
 async def get_database() -> AsyncIOMotorDatabase:
     """
@@ -20,9 +33,24 @@ async def get_database() -> AsyncIOMotorDatabase:
     Returns the same instance if already connected.
     """
     global _db
-    if _db is None:
-        client = AsyncIOMotorClient(MONGODB_URL)
-        _db = client[DATABASE_NAME]
+    if _db is not None:
+        return _db
+    
+    async with _db_lock:
+        # Another task may have connected while this one waited for the lock
+        if _db is None:
+            client = AsyncIOMotorClient(
+                MONGODB_URL,
+                maxPoolSize=MONGODB_MAX_POOL_SIZE,
+                minPoolSize=MONGODB_MIN_POOL_SIZE,
+                maxIdleTimeMS=MONGODB_MAX_IDLE_TIME_MS,
+                waitQueueTimeoutMS=MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+                connectTimeoutMS=MONGODB_CONNECT_TIMEOUT_MS,
+                serverSelectionTimeoutMS=MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+                compressors=MONGODB_COMPRESSORS,
+                retryWrites=True
+            )
+            _db = client[DATABASE_NAME]
     return _db
 
 async def init_indexes():
@@ -32,44 +60,66 @@ async def init_indexes():
     """
     db = await get_database()
     
-    # Drop existing indexes to clean up
-    await db.users.drop_indexes()
-    
-    # User indexes
-    await db.users.create_index("email", unique=True)
-    await db.users.create_index("last_login")
-    
-    # Course indexes
-    await db.courses.create_index("instructor_id")
-    await db.courses.create_index("title")
-    await db.courses.create_index("created_at")
-    
-    # Material indexes
-    await db.materials.create_index("course_id")
-    await db.materials.create_index("created_by")
-    await db.materials.create_index([("title", "text"), ("description", "text")])
-    
-    # Quiz indexes
-    await db.quizzes.create_index("course_id")
-    await db.quizzes.create_index("created_by")
-    
-    # Progress indexes
-    await db.user_progress.create_index([("user_id", 1), ("course_id", 1)], unique=True)
-    await db.user_progress.create_index("last_accessed")
-    
-    # Quiz submission indexes
-    await db.quiz_submissions.create_index([("user_id", 1), ("quiz_id", 1)])
-    await db.quiz_submissions.create_index("course_id")
-    await db.quiz_submissions.create_index("submitted_at")
-    
-    # Chat indexes
-    await db.chats.create_index([("user_id", 1), ("course_id", 1)])
-    await db.chats.create_index("created_at")
-    
-    # Audit log indexes
-    await db.audit_log.create_index("timestamp")
-    await db.audit_log.create_index("user_id")
-    await db.audit_log.create_index("action_type")
+    # One createIndexes command per collection, all collections in parallel
+    await asyncio.gather(
+        # User indexes
+        db.users.create_indexes([
+            IndexModel([("email", 1)], unique=True),
+            IndexModel([("last_login", 1)])
+        ]),
+        
+        # Course indexes
+        db.courses.create_indexes([
+            IndexModel([("instructor_id", 1)]),
+            IndexModel([("title", 1)]),
+            IndexModel([("created_at", 1)]),
+            IndexModel([("students", 1)]),
+            IndexModel([("teacher_id", 1)])
+        ]),
+        
+        # Material indexes; (course_id, _id) also covers course_id-only lookups
+        db.materials.create_indexes([
+            IndexModel([("course_id", 1), ("_id", 1)]),
+            IndexModel([("created_by", 1)]),
+            IndexModel([("title", "text"), ("description", "text")])
+        ]),
+        
+        # Quiz indexes
+        db.quizzes.create_indexes([
+            IndexModel([("course_id", 1), ("created_at", -1)]),
+            IndexModel([("course_id", 1), ("_id", 1)]),
+            IndexModel([("created_by", 1)])
+        ]),
+        
+        # Progress indexes
+        db.user_progress.create_indexes([
+            IndexModel([("user_id", 1), ("course_id", 1)], unique=True),
+            IndexModel([("last_accessed", 1)])
+        ]),
+        
+        # Quiz submission indexes
+        db.quiz_submissions.create_indexes([
+            IndexModel([("user_id", 1), ("quiz_id", 1), ("status", 1)]),
+            IndexModel([("course_id", 1)]),
+            IndexModel([("submitted_at", 1)])
+        ]),
+        
+        # Chat indexes
+        db.chats.create_indexes([
+            IndexModel([("user_id", 1), ("course_id", 1)]),
+            IndexModel([("created_at", 1)])
+        ]),
+        db.messages.create_indexes([
+            IndexModel([("course_id", 1), ("timestamp", -1)])
+        ]),
+        
+        # Audit log indexes
+        db.audit_log.create_indexes([
+            IndexModel([("timestamp", 1)]),
+            IndexModel([("user_id", 1)]),
+            IndexModel([("action_type", 1)])
+        ])
+    )
 
 async def close_db_connection():
     """
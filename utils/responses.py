@@ -0,0 +1,24 @@
+from typing import Any
+from bson import ObjectId
+from fastapi.responses import ORJSONResponse
+import orjson
+
+def _default(value: Any) -> Any:
+    """
+    Encode the BSON types orjson does not handle natively.
+    """
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+class MongoJSONResponse(ORJSONResponse):
+    """
+    ORJSONResponse that also encodes ObjectIds, so raw MongoDB documents can be
+    returned directly without going through jsonable_encoder.
+    """
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )